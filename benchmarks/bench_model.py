@@ -0,0 +1,377 @@
+"""Benchmarks for ExerciseModel and TextEdit on synthetic databases.
+
+Run from the repository root, e.g.
+
+    python -m benchmarks.bench_model --sizes 1000 10000 --output bench.json
+
+Qt runs on the offscreen platform unless QT_QPA_PLATFORM says otherwise. The
+databases are generated once per size and seed, and kept in --data-dir for later
+runs. Results are written as JSON, with one entry per benchmark and size, so that
+runs can be compared.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# pylint: disable=wrong-import-position
+from PyQt5.QtCore import PYQT_VERSION_STR, QT_VERSION_STR, QModelIndex, Qt
+from PyQt5.QtWidgets import QApplication, QCompleter, QWidget
+
+from franklin_writing_exercise import exercise_io
+from franklin_writing_exercise.exercise_model import ExerciseColumns, ExerciseModel
+from franklin_writing_exercise.exercise_store import ExerciseStore
+from franklin_writing_exercise.text_edit import TextEdit
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+# Number of times each benchmark is run, unless it says otherwise
+REPEAT = 200
+# Rows and columns on screen, as read by a table view painting one screenful
+VISIBLE_ROWS = 40
+
+WORDS = (
+    "the a of and to in that it was his he for with as had not but be which at by "
+    "on this all their were have from they so one what when there more would some "
+    "him been no if them could into any than such upon only men made time may our "
+    "great should most very those before every much being where who these other "
+    "nature virtue reason wit learning judgment fancy passion design genius manner "
+    "conversation spectator company humour character discourse pleasure mind world "
+    "observe consider imagine natural particular general agreeable proper common"
+).split()
+AUTHORS = [
+    f"{first} {last}"
+    for first in (
+        "Joseph",
+        "Richard",
+        "Samuel",
+        "Jonathan",
+        "Alexander",
+        "Mary",
+        "Daniel",
+        "Henry",
+    )
+    for last in (
+        "Addison",
+        "Steele",
+        "Johnson",
+        "Swift",
+        "Pope",
+        "Astell",
+        "Defoe",
+        "Fielding",
+    )
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(8, 30))
+    return " ".join(words).capitalize() + "."
+
+
+def _passage(rng: random.Random, low: int, high: int) -> str:
+    """Return paragraphs of `low` to `high` sentences in all."""
+    sentences = [_sentence(rng) for _ in range(rng.randint(low, high))]
+    paragraphs = []
+    while sentences:
+        count = rng.randint(3, 6)
+        paragraphs.append(" ".join(sentences[:count]))
+        del sentences[:count]
+    return "\n".join(paragraphs)
+
+
+def _notes(rng: random.Random, original: str) -> str:
+    """Return one line of key words per sentence, as written in the notes step."""
+    return "\n".join(
+        " ".join(rng.sample(sentence.split(), min(4, len(sentence.split()))))
+        for sentence in original.replace("\n", " ").split(". ")
+    )
+
+
+def generate_records(size: int, seed: int) -> Iterator[Dict[str, str]]:
+    """Yield `size` exercises in various stages: most only have an original
+    passage, fewer have notes, a rewrite and a correction."""
+    rng = random.Random(seed)
+    for i in range(size):
+        original = _passage(rng, 6, 20)
+        issue = rng.randint(1, size // 4 + 1)
+        record = {
+            ExerciseColumns.Author.name: rng.choice(AUTHORS),
+            ExerciseColumns.Source.name: f"The Spectator No. {issue}",
+            ExerciseColumns.Original.name: original,
+        }
+        stage = i % 10
+        if stage < 5:
+            record[ExerciseColumns.Notes.name] = _notes(rng, original)
+        if stage < 3:
+            record[ExerciseColumns.Rewrite.name] = _passage(rng, 6, 20)
+        if stage < 1:
+            record[ExerciseColumns.Correction.name] = _passage(rng, 2, 6)
+        yield record
+
+
+def database(data_dir: pathlib.Path, size: int, seed: int) -> pathlib.Path:
+    """Return the path of a database of `size` exercises, generating it if needed."""
+    path = data_dir / f"bench-{size}-{seed}.sqlite3"
+    if not path.exists():
+        partial = path.with_suffix(".partial")
+        for stale in data_dir.glob(partial.name + "*"):
+            stale.unlink()
+        print(f"Generating {size} exercises in {path}", file=sys.stderr)
+        store = ExerciseStore(str(partial))
+        exercise_io.import_records(store.connection, generate_records(size, seed))
+        store.connection.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        store.close()
+        partial.rename(path)
+    return path
+
+
+def measure(
+    func: Callable[[int], Any],
+    repeat: int = REPEAT,
+    setup: Optional[Callable[[], Any]] = None,
+) -> Dict[str, float]:
+    """Time `repeat` calls of `func(i)`, with `setup()` untimed before each call.
+
+    Times are in milliseconds.
+    """
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func(i)
+        times.append((time.perf_counter() - start) * 1000)
+    return _statistics(times)
+
+
+def bench_model(app: QApplication, path: pathlib.Path, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    results = {}
+    parent = QWidget()
+
+    results["open"] = measure(lambda _: ExerciseModel(str(path)).close(), repeat=10)
+    model = ExerciseModel(str(path), parent)
+    try:
+        results["fetch_all"] = measure(lambda _: _fetch_all(model), repeat=1)
+        rows = model.rowCount()
+        columns = model.columnCount(QModelIndex())
+        results["row_count"] = measure(lambda _: model.rowCount(), repeat=10000)
+
+        # A screenful of cells starting at a random row, read once the summaries of
+        # its rows are cached and the cells have been read once, as when a view
+        # repaints.
+        def screenful(role: int):
+            first = rng.randrange(max(1, rows - VISIBLE_ROWS))
+            screen = [
+                model.index(row, column)
+                for row in range(first, min(rows, first + VISIBLE_ROWS))
+                for column in range(columns)
+            ]
+            _wait_for_rows(app, model, screen)
+            for index in screen:
+                model.data(index, role)
+            return lambda _: [model.data(index, role) for index in screen]
+
+        results["data_display_screen"] = _measure_screens(
+            lambda: screenful(Qt.DisplayRole)
+        )
+        results["data_size_hint_screen"] = _measure_screens(
+            lambda: screenful(Qt.SizeHintRole)
+        )
+        results["data_size_hint_screen_uncached"] = _measure_screens(
+            lambda: screenful(Qt.SizeHintRole), setup=model.clear_size_hints
+        )
+
+        results["set_data"] = measure(
+            lambda i: model.set_data(
+                rng.randrange(rows), ExerciseColumns.Notes, f"Edited notes {i}"
+            ),
+            repeat=1000,
+        )
+        results["flush"] = measure(
+            lambda i: model.flush(wait=True),
+            setup=lambda: model.set_data(
+                rng.randrange(rows), ExerciseColumns.Rewrite, f"Rewrite {rng.random()}"
+            ),
+        )
+
+        results["get_row"] = measure(lambda _: model.get_row(rng.randrange(rows)))
+        results["get_values_notes"] = measure(
+            lambda _: model.get_values(rng.randrange(rows), (ExerciseColumns.Notes,))
+        )
+
+        results["insert_row"] = measure(
+            lambda _: model.insertRow(model.rowCount()), repeat=100
+        )
+        results["remove_row"] = measure(
+            lambda _: model.removeRow(model.rowCount() - 1), repeat=100
+        )
+
+        results["unique_model_load"] = measure(
+            lambda _: ExerciseModel.UniqueColumnModel(model, ExerciseColumns.Source),
+            repeat=10,
+        )
+        completer = QCompleter(
+            ExerciseModel.UniqueColumnModel(model, ExerciseColumns.Source), parent
+        )
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setModelSorting(QCompleter.CaseInsensitivelySortedModel)
+        prefixes = ["", "t", "The Spec", "the spectator no. 1", "x"]
+
+        def complete(i: int):
+            completer.setCompletionPrefix(prefixes[i % len(prefixes)])
+            return completer.completionCount()
+
+        results["completion"] = measure(complete, repeat=len(prefixes) * 40)
+    finally:
+        model.close()
+    parent.deleteLater()
+    app.processEvents()
+    return results
+
+
+def bench_text_edit(app: QApplication, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    edit = TextEdit()
+    edit.resize(800, 600)
+    edit.show()
+    results = {}
+    texts = {
+        "passage": [_passage(rng, 6, 20) for _ in range(20)],
+        "long_document": [_passage(rng, 400, 400) for _ in range(2)],
+    }
+    for name, samples in texts.items():
+        # Includes laying the document out, as happens before it is painted
+        results[f"text_edit_set_plain_text_{name}"] = measure(
+            lambda i: (
+                edit.setPlainText(samples[i % len(samples)]),
+                edit.document().size(),
+                app.processEvents(),
+            ),
+            repeat=50,
+        )
+    edit.close()
+    edit.deleteLater()
+    app.processEvents()
+    return results
+
+
+def _fetch_all(model: ExerciseModel):
+    while model.canFetchMore():
+        model.fetchMore()
+
+
+def _wait_for_rows(app: QApplication, model: ExerciseModel, screen: List[QModelIndex]):
+    """Process events until the rows of `screen` are read by the storage worker."""
+    deadline = time.monotonic() + 10
+    modified = [model.index(index.row(), model.MODIFIED_COLUMN) for index in screen]
+    while any(model.data(index) == "" for index in modified):
+        if time.monotonic() > deadline:
+            raise TimeoutError("rows were not read within 10 seconds")
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def _measure_screens(
+    prepare: Callable[[], Callable[[int], Any]],
+    setup: Optional[Callable[[], Any]] = None,
+    screens: int = 50,
+) -> Dict[str, float]:
+    """Measure reading screenfuls of cells, each prepared by `prepare()`."""
+    times = []
+    for _ in range(screens):
+        read = prepare()
+        times.append(measure(read, repeat=1, setup=setup)["min_ms"])
+    return _statistics(times)
+
+
+def _statistics(times: List[float]) -> Dict[str, float]:
+    times = sorted(times)
+    return {
+        "runs": len(times),
+        "min_ms": times[0],
+        "median_ms": statistics.median(times),
+        "mean_ms": statistics.fmean(times),
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+        "max_ms": times[-1],
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="numbers of exercises in the databases (default: %(default)s)",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--data-dir",
+        type=pathlib.Path,
+        default=pathlib.Path(tempfile.gettempdir()) / "franklin-bench",
+        help="where generated databases are kept (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--output", type=pathlib.Path, help="JSON results file (default: stdout)"
+    )
+    return parser
+
+
+def run(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+    app = QApplication(sys.argv[:1])
+
+    benchmarks = []
+    for size in args.sizes:
+        path = database(args.data_dir, size, args.seed)
+        # Work on a copy, so that edits made by the benchmarks do not accumulate
+        work = args.data_dir / f"work-{size}.sqlite3"
+        source = ExerciseStore(str(path))
+        target = ExerciseStore(str(work))
+        source.connection.backup(target.connection)
+        source.close()
+        target.close()
+        print(f"Benchmarking {size} exercises", file=sys.stderr)
+        for name, result in bench_model(app, work, args.seed).items():
+            benchmarks.append({"name": name, "size": size, **result})
+        for suffix in ("", "-wal", "-shm", ".journal"):
+            pathlib.Path(f"{work}{suffix}").unlink(missing_ok=True)
+
+    print("Benchmarking TextEdit", file=sys.stderr)
+    for name, result in bench_text_edit(app, args.seed).items():
+        benchmarks.append({"name": name, "size": None, **result})
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "qpa_platform": os.environ["QT_QPA_PLATFORM"],
+        "seed": args.seed,
+        "benchmarks": benchmarks,
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,163 @@
+"""Replays a typing session in the main window and reports the time from each
+keypress until its edit is committed to the database.
+
+Run from the repository root, e.g.
+
+    python -m benchmarks.replay_session session.jsonl --output latency.json
+    python -m benchmarks.replay_session --generate 500
+
+Sessions are recorded by running the application with FRANKLIN_RECORD_SESSION
+set to a file name. Without a session file, --generate types a synthetic one.
+Qt runs on the offscreen platform unless QT_QPA_PLATFORM says otherwise, on a
+new database in a temporary directory.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import random
+import sys
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# pylint: disable=wrong-import-position
+from PyQt5.QtCore import QElapsedTimer, QEvent, Qt
+from PyQt5.QtGui import QKeyEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication, QWidget
+
+from franklin_writing_exercise.main_window import MainWindow
+
+# Editor typed into at each step by generated sessions
+GENERATED_EDITORS = ((0, "edit_notes"), (1, "edit_rewrite"))
+WORDS = (
+    "the of and to in that it was for with as had not but be which at by on this "
+    "all nature virtue reason wit learning judgment fancy passion design genius"
+).split()
+
+
+def read_session(path: pathlib.Path) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def generate_session(keys: int, seed: int) -> Iterator[Dict[str, Any]]:
+    """Yield `keys` keypresses typing words at about 8 keys a second, split
+    between the editors of GENERATED_EDITORS, with some corrections and pauses."""
+    rng = random.Random(seed)
+    now = 0.0
+    per_editor = keys // len(GENERATED_EDITORS)
+    for step, editor in GENERATED_EDITORS:
+        typed = 0
+        while typed < per_editor:
+            word = rng.choice(WORDS) + (" " if rng.random() < 0.9 else "\n")
+            for char in word:
+                now += rng.uniform(0.05, 0.2)
+                key = Qt.Key_Return if char == "\n" else ord(char.upper())
+                yield _key(now, editor, step, key, char)
+                typed += 1
+            if rng.random() < 0.05:
+                now += rng.uniform(0.05, 0.2)
+                yield _key(now, editor, step, Qt.Key_Backspace, "\b")
+                typed += 1
+            if rng.random() < 0.02:
+                # Stops to think
+                now += rng.uniform(1, 3)
+
+
+def _key(time: float, editor: str, step: int, key: int, text: str) -> Dict[str, Any]:
+    return {
+        "time": round(time, 4),
+        "editor": editor,
+        "step": step,
+        "key": int(key),
+        "modifiers": 0,
+        "text": "\r" if key == Qt.Key_Return else text,
+    }
+
+
+def replay(window: MainWindow, session: List[Dict[str, Any]], speed: float):
+    """Send the keypresses of `session` to the editors of `window`, at their
+    recorded times divided by `speed`."""
+    clock = QElapsedTimer()
+    clock.start()
+    for event in session:
+        delay = int(event["time"] / speed * 1000) - clock.elapsed()
+        if delay > 0:
+            QTest.qWait(delay)
+        if window.tabbar.currentIndex() != event["step"]:
+            window.tabbar.tabBarClicked.emit(event["step"])
+        editor = window.findChild(QWidget, event["editor"])
+        modifiers = Qt.KeyboardModifiers(event["modifiers"])
+        for kind in (QEvent.KeyPress, QEvent.KeyRelease):
+            QApplication.sendEvent(
+                editor, QKeyEvent(kind, event["key"], modifiers, event["text"])
+            )
+        QApplication.processEvents()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", 1)[0])
+    parser.add_argument("session", nargs="?", type=pathlib.Path)
+    parser.add_argument(
+        "--generate",
+        type=int,
+        metavar="KEYS",
+        help="type a generated session of KEYS keypresses instead of a recorded one",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="replay this many times faster than recorded (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--output", type=pathlib.Path, help="JSON report file (default: stdout)"
+    )
+    return parser
+
+
+def run(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if (args.session is None) == (args.generate is None):
+        parser.error("give either a session file or --generate")
+    if args.session is not None:
+        session = read_session(args.session)
+    else:
+        session = list(generate_session(args.generate, args.seed))
+
+    app = QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as directory:
+        window = MainWindow(pathlib.Path(directory) / "replay.sqlite3")
+        window.show()
+        print(f"Replaying {len(session)} keypresses", file=sys.stderr)
+        replay(window, session, args.speed)
+        # Closing writes the remaining edits; their latency includes the wait
+        window.close()
+        app.processEvents()
+        report = window.latency_probe.report()
+
+    total = report["total"]
+    if total is not None:
+        print(
+            f"{total['count']} edits committed: p50 {total['p50_ms']:.1f} ms, "
+            f"p90 {total['p90_ms']:.1f} ms, p99 {total['p99_ms']:.1f} ms, "
+            f"max {total['max_ms']:.1f} ms",
+            file=sys.stderr,
+        )
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
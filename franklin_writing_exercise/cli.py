@@ -0,0 +1,148 @@
+import argparse
+import csv
+import pathlib
+import sqlite3
+import sys
+from typing import List, Optional
+
+from franklin_writing_exercise import exercise_io
+from franklin_writing_exercise.exercise_store import (
+    ExerciseColumns,
+    ExerciseStore,
+    StorageProfile,
+    default_database_path,
+    search_query,
+)
+
+
+def _parse_columns(value: str) -> List[ExerciseColumns]:
+    try:
+        return [ExerciseColumns[name.strip()] for name in value.split(",")]
+    except KeyError as e:
+        raise argparse.ArgumentTypeError(f"unknown column {e}") from e
+
+
+def cmd_info(store: ExerciseStore, _):
+    print(f"schema\t{store.schema_version()}")
+    print(f"profile\t{store.profile.value}")
+    for pragma, value in store.settings.items():
+        print(f"{pragma}\t{value}")
+
+
+def cmd_list(store: ExerciseStore, _):
+    for rowid, (author, source, preview, _) in store.iter_summaries():
+        print(f"{rowid}\t{author}\t{source}\t{preview}")
+
+
+def cmd_add(store: ExerciseStore, args):
+    original = sys.stdin.read() if args.original == "-" else args.original
+    rowid = store.insert(
+        {
+            ExerciseColumns.Author: args.author,
+            ExerciseColumns.Source: args.source,
+            ExerciseColumns.Original: original,
+        }
+    )
+    print(rowid)
+
+
+def cmd_search(store: ExerciseStore, args):
+    query = search_query(args.query)
+    if not query:
+        # Nothing to match, so every exercise is shown, as in the table
+        for rowid, (_, _, preview, _) in store.iter_summaries():
+            print(f"{rowid}\t{preview}")
+        return
+    rowids = store.search_rowids(query)
+    snippets = store.snippets(query, rowids)
+    for rowid in rowids:
+        print(f"{rowid}\t{snippets[rowid]}")
+
+
+def cmd_import(store: ExerciseStore, args):
+    def report(count: int):
+        print(f"\rImported {count}", end="", file=sys.stderr, flush=True)
+
+    count = exercise_io.import_records(
+        store.connection, exercise_io.read_records(args.path), report
+    )
+    print(f"\rImported {count}", file=sys.stderr)
+
+
+def cmd_export(store: ExerciseStore, args):
+    count = exercise_io.export_records(
+        store.connection, args.path, args.columns, args.search
+    )
+    print(f"Exported {count}", file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="franklin-exercise-cli", description="Manage Franklin writing exercises."
+    )
+    parser.add_argument(
+        "--db",
+        type=pathlib.Path,
+        help="database file (default: the one used by franklin-exercise)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=[profile.value for profile in StorageProfile],
+        help="storage profile (default: $FRANKLIN_STORAGE_PROFILE or durable)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("info", help="show the storage settings in effect")
+    cmd.set_defaults(func=cmd_info)
+
+    cmd = commands.add_parser("list", help="list all exercises")
+    cmd.set_defaults(func=cmd_list)
+
+    cmd = commands.add_parser("add", help="add an exercise and print its id")
+    cmd.add_argument("original", help="the original passage, or - to read stdin")
+    cmd.add_argument("--author", default="")
+    cmd.add_argument("--source", default="")
+    cmd.set_defaults(func=cmd_add)
+
+    cmd = commands.add_parser("search", help="full-text search, best matches first")
+    cmd.add_argument("query")
+    cmd.set_defaults(func=cmd_search)
+
+    cmd = commands.add_parser(
+        "import", help="import a .jsonl or .csv file, or a directory of .txt files"
+    )
+    cmd.add_argument("path", type=pathlib.Path)
+    cmd.set_defaults(func=cmd_import)
+
+    cmd = commands.add_parser("export", help="export to a .jsonl, .csv or .md file")
+    cmd.add_argument("path", type=pathlib.Path)
+    cmd.add_argument(
+        "--columns",
+        type=_parse_columns,
+        default=list(ExerciseColumns),
+        help="comma-separated columns to export (default: all)",
+    )
+    cmd.add_argument("--search", default="", help="only export matching exercises")
+    cmd.set_defaults(func=cmd_export)
+
+    return parser
+
+
+def run(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    profile = StorageProfile(args.profile) if args.profile else None
+    store = None
+    try:
+        store = ExerciseStore(str(args.db or default_database_path()), profile)
+        args.func(store, args)
+    except (OSError, ValueError, csv.Error, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if store is not None:
+            store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
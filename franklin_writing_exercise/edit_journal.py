@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from franklin_writing_exercise.exercise_store import ExerciseColumns, ExerciseStore
+
+# This module must not import Qt: the storage layer depends on it.
+
+
+def journal_path(filename: str) -> Optional[str]:
+    """Return the journal file of a database, or None if it has no file."""
+    if filename in ("", ":memory:"):
+        return None
+    return f"{filename}.journal"
+
+
+def read_entries(path: str) -> Iterator[dict]:
+    """Yield the entries of a journal file, up to any torn write at its end."""
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with file:
+        for line in file:
+            if not line.endswith(b"\n"):
+                return
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
+
+
+def replay(store: ExerciseStore, path: str) -> int:
+    """Write the edits journaled in `path` after those already in the table, and
+    return how many there were.
+
+    Texts are edited as UTF-16, the unit of the positions Qt reports.
+    """
+    applied = store.journal_seq()
+    texts: Dict[Tuple[int, ExerciseColumns], Optional[bytearray]] = {}
+    last = applied
+    for entry in read_entries(path):
+        if entry["seq"] <= applied:
+            continue
+        last = entry["seq"]
+        rowid = entry["row"]
+        if entry.get("drop"):
+            # Later entries of the rowid are of a new row reusing it
+            for key in [key for key in texts if key[0] == rowid]:
+                del texts[key]
+            continue
+        key = (rowid, ExerciseColumns[entry["col"]])
+        if key not in texts:
+            values = store.get_values(rowid, (key[1],))
+            # None if the row has been deleted since
+            texts[key] = (
+                None if values is None else bytearray(values[0].encode("utf-16-le"))
+            )
+        text = texts[key]
+        if text is None:
+            continue
+        start = entry["pos"] * 2
+        text[start : start + entry["del"] * 2] = entry["ins"].encode("utf-16-le")
+    if last > applied:
+        store.update(
+            (
+                (key, text.decode("utf-16-le", errors="surrogatepass"))
+                for key, text in texts.items()
+                if text is not None
+            ),
+            last,
+        )
+    return last - applied
+
+
+class EditJournal:
+    """Append-only file of the edits made to texts, one JSON object per line.
+
+    Each entry replaces `del` UTF-16 code units at `pos` of a column of a row with
+    `ins`, or records that a row was dropped. Entries are numbered, and the table
+    records the number of the last entry it includes (ExerciseStore.journal_seq),
+    so that after a crash `replay` writes only the entries missing from it.
+
+    Entries are appended to memory by the GUI thread, and written and synced to
+    disk in batches by `sync`, from any thread.
+    """
+
+    def __init__(self, path: str, seq: int):
+        self._path = path
+        self._file = open(path, "ab")
+        # Guards _buffer and _seq
+        self._lock = threading.Lock()
+        # Guards the file and _synced_seq, so that appending never waits on a sync
+        self._file_lock = threading.Lock()
+        # Entries not yet written to the file, as (seq, line)
+        self._buffer: List[Tuple[int, bytes]] = []
+        self._seq = seq
+        # Number of the last entry written to the file
+        self._synced_seq = seq
+
+    @property
+    def seq(self) -> int:
+        """The number of the last entry."""
+        return self._seq
+
+    def append(
+        self,
+        rowid: int,
+        column: ExerciseColumns,
+        position: int,
+        removed: int,
+        text: str,
+    ):
+        """Journal replacing `removed` UTF-16 code units at `position` with `text`."""
+        self._append(
+            {
+                "row": rowid,
+                "col": column.name,
+                "pos": position,
+                "del": removed,
+                "ins": text,
+            }
+        )
+
+    def drop(self, rowid: int):
+        """Journal that a row was deleted, so that replay ignores its earlier edits,
+        and sync right away: its rowid may be reused."""
+        self._append({"row": rowid, "drop": True})
+        self.sync()
+
+    def sync(self):
+        """Write the entries appended so far, and flush them to disk."""
+        with self._file_lock:
+            with self._lock:
+                buffer, self._buffer = self._buffer, []
+                seq = self._seq
+            if not buffer:
+                return
+            self._file.write(b"".join(line for _, line in buffer))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._synced_seq = seq
+
+    def compact(self, seq: int):
+        """Discard the entries up to `seq`, which the table now includes: empty the
+        file if it holds no others, and forget those not yet written."""
+        with self._file_lock:
+            with self._lock:
+                self._buffer = [entry for entry in self._buffer if entry[0] > seq]
+            if self._synced_seq <= seq:
+                self._file.truncate(0)
+
+    def close(self):
+        try:
+            self.sync()
+        finally:
+            self._file.close()
+
+    def _append(self, entry: dict):
+        with self._lock:
+            self._seq += 1
+            entry["seq"] = self._seq
+            self._buffer.append(
+                (
+                    self._seq,
+                    json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n",
+                )
+            )
@@ -0,0 +1,178 @@
+import csv
+import itertools
+import json
+import pathlib
+import sqlite3
+from typing import Callable, Iterable, Iterator, Mapping, Optional, Sequence, TextIO
+
+from franklin_writing_exercise.exercise_store import (
+    ExerciseColumns,
+    preview,
+    search_query,
+)
+
+Record = Mapping[str, str]
+
+# Number of records inserted per transaction by `import_records`
+IMPORT_CHUNK_SIZE = 1000
+
+
+def read_jsonl(path: pathlib.Path) -> Iterator[Record]:
+    """Yield one record per non-empty line, each a JSON object keyed by column name."""
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            if line.strip():
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"line {number}: expected an object")
+                yield record
+
+
+def read_csv(path: pathlib.Path) -> Iterator[Record]:
+    """Yield one record per row of a CSV file whose header names the columns."""
+    with open(path, encoding="utf-8", newline="") as file:
+        yield from csv.DictReader(file)
+
+
+def read_text_directory(path: pathlib.Path) -> Iterator[Record]:
+    """Yield one record per `*.txt` file, with the text as the original passage and
+    the file name as the source."""
+    for file in sorted(path.glob("*.txt")):
+        yield {
+            ExerciseColumns.Source.name: file.stem,
+            ExerciseColumns.Original.name: file.read_text(encoding="utf-8"),
+        }
+
+
+def read_records(path: pathlib.Path) -> Iterator[Record]:
+    """Read records from a JSONL file, a CSV file or a directory of text files."""
+    if path.is_dir():
+        return read_text_directory(path)
+    if path.suffix.lower() == ".csv":
+        return read_csv(path)
+    if path.suffix.lower() == ".jsonl":
+        return read_jsonl(path)
+    raise ValueError(f"Unsupported import format: {path}")
+
+
+def import_records(
+    db: sqlite3.Connection,
+    records: Iterable[Record],
+    progress: Optional[Callable[[int], None]] = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> int:
+    """Insert `records` into FranklinExercise and return how many were inserted.
+
+    Records are consumed lazily and inserted `chunk_size` at a time, one transaction
+    per chunk, so memory use does not depend on the number of records. Missing
+    columns are left empty and unknown keys are ignored. `progress` is called with
+    the running total after each chunk.
+    """
+    columns = ",".join(col.name for col in ExerciseColumns) + ",Preview"
+    placeholders = ",".join("?" for _ in ExerciseColumns) + ",?"
+    rows = (
+        values + (preview(values[ExerciseColumns.Original.value]),)
+        for values in (
+            tuple(str(record.get(col.name) or "") for col in ExerciseColumns)
+            for record in records
+        )
+    )
+
+    total = 0
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        with db:
+            db.executemany(
+                f"INSERT INTO FranklinExercise ({columns}) VALUES ({placeholders});",
+                chunk,
+            )
+        total += len(chunk)
+        if progress is not None:
+            progress(total)
+    return total
+
+
+def query_records(
+    db: sqlite3.Connection, columns: Sequence[ExerciseColumns], search: str = ""
+) -> Iterator[Record]:
+    """Yield the selected `columns` of every exercise, or of those matching `search`.
+
+    Only the selected columns are read, and rows are yielded as SQLite steps through
+    them rather than fetched all at once.
+    """
+    selected = ",".join(col.name for col in columns)
+    # A search of only whitespace matches every row, as in the table
+    query = search_query(search)
+    if query:
+        cursor = db.execute(
+            f"SELECT {selected} FROM FranklinExercise WHERE rowid IN ("
+            "SELECT rowid FROM FranklinExerciseSearch "
+            "WHERE FranklinExerciseSearch MATCH ?) ORDER BY rowid;",
+            (query,),
+        )
+    else:
+        cursor = db.execute(f"SELECT {selected} FROM FranklinExercise ORDER BY rowid;")
+    names = [col.name for col in columns]
+    for row in cursor:
+        yield dict(zip(names, row))
+
+
+def write_jsonl(file: TextIO, records: Iterable[Record], _):
+    for record in records:
+        file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def write_csv(
+    file: TextIO, records: Iterable[Record], columns: Sequence[ExerciseColumns]
+):
+    writer = csv.DictWriter(file, fieldnames=[col.name for col in columns])
+    writer.writeheader()
+    writer.writerows(records)
+
+
+def write_markdown(
+    file: TextIO, records: Iterable[Record], columns: Sequence[ExerciseColumns]
+):
+    for number, record in enumerate(records, 1):
+        file.write(f"# Exercise {number}\n\n")
+        for col in columns:
+            file.write(f"## {col.name}\n\n{record[col.name]}\n\n")
+
+
+EXPORT_WRITERS = {
+    ".jsonl": write_jsonl,
+    ".csv": write_csv,
+    ".md": write_markdown,
+}
+
+
+def export_records(
+    db: sqlite3.Connection,
+    path: pathlib.Path,
+    columns: Sequence[ExerciseColumns] = tuple(ExerciseColumns),
+    search: str = "",
+) -> int:
+    """Write exercises to `path` as JSONL, CSV or Markdown, chosen by its suffix, and
+    return how many were written.
+
+    Each record is written as soon as it is read, so memory use does not depend on
+    the size of the database.
+    """
+    writer = EXPORT_WRITERS.get(path.suffix.lower())
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {path}")
+
+    count = 0
+
+    def counted(records: Iterable[Record]) -> Iterator[Record]:
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    newline = "" if writer is write_csv else None
+    with open(path, "w", encoding="utf-8", newline=newline) as file:
+        writer(file, counted(query_records(db, columns, search)), columns)
+    return count
@@ -1,77 +1,429 @@
-import enum
-import sqlite3
-from typing import Any
+import bisect
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
 
 from PyQt5.QtCore import (
     QAbstractListModel,
     QAbstractTableModel,
+    QCoreApplication,
+    QDateTime,
+    QEvent,
+    QLocale,
     QMargins,
+    QMetaObject,
     QModelIndex,
+    QSize,
     Qt,
+    QTimer,
 )
+from PyQt5.QtCore import pyqtSignal as signal
+from PyQt5.QtCore import pyqtSlot as slot
 from PyQt5.QtGui import QFontMetrics
 
+from franklin_writing_exercise.edit_journal import EditJournal, journal_path, replay
+from franklin_writing_exercise.exercise_store import (  # pylint: disable=unused-import
+    SUMMARY_COLUMNS,
+    ExerciseColumns,
+    ExerciseStore,
+    preview,
+    search_query,
+)
+from franklin_writing_exercise.storage_worker import StorageWorker
+
 # pylint: disable=no-self-use
 
 
-@enum.unique
-class ExerciseColumns(enum.Enum):
-    Author = 0
-    Source = 1
-    Original = 2
-    Notes = 3
-    Rewrite = 4
-    Correction = 5
-    Poetry = 6
-    Prose = 7
+class ExerciseModel(QAbstractTableModel):
+    # Number of rows loaded at a time by fetchMore
+    PAGE_SIZE = 500
+    # Number of cells whose size hint is remembered
+    SIZE_HINT_CACHE_SIZE = 4096
+    # Number of rows whose values are kept for display
+    ROW_CACHE_SIZE = 2000
+    # Number of full column values kept to compare edits against
+    VALUE_CACHE_SIZE = 64
+    # Milliseconds an edit may wait to be flushed while editing goes on
+    MAX_FLUSH_DELAY = 3000
+    # Milliseconds journaled edits are collected for before being synced to disk
+    JOURNAL_SYNC_DELAY = 200
+    # Column showing when an exercise was last modified, after ExerciseColumns
+    MODIFIED_COLUMN = len(ExerciseColumns)
 
+    # Emitted with an error message when edits could not be saved
+    write_failed = signal(str)
+    # Emitted with an error message when rows could not be read, or the edit journal
+    # written
+    storage_failed = signal(str)
+    # Emitted with the (rowid, column) keys of edits once committed, and the
+    # time.perf_counter() value when they were sent to be written. Edits that need
+    # no write, as they leave a value as it is, are reported once it is committed,
+    # with the time they were made.
+    edits_written = signal(list, float)
+    # Emitted with the running total of records inserted by `import_file`
+    import_progress = signal(int)
+    # Emitted with the number of records `import_file` inserted, and an error
+    # message if the import failed, or an empty one
+    import_finished = signal(int, str)
 
-class ExerciseModel(QAbstractTableModel):
-    def __init__(self, filename: str, parent=None):
+    _write_requested = signal(int, list, int)
+    _read_requested = signal(list)
+    _snippets_requested = signal(str, list)
+    _journal_sync_requested = signal()
+    _import_requested = signal(str)
+
+    def __init__(self, filename: str, parent=None, flush_delay: int = 1000):
         super().__init__(parent=parent)
-        self._filename = filename
+        self._store = ExerciseStore(filename)
 
-        self._db = sqlite3.connect(self._filename)
-        self._db.execute(
-            "CREATE TABLE IF NOT EXISTS FranklinExercise ("
-            + ",".join(col.name + " TEXT DEFAULT ''" for col in ExerciseColumns)
-            + ");"
-        )
+        # Text edits are journaled as they are made, so that those not yet flushed
+        # survive a crash. Edits left over from the last run are written first.
+        self._journal: Optional[EditJournal] = None
+        path = journal_path(filename)
+        if path is not None:
+            replay(self._store, path)
+            self._journal = EditJournal(path, self._store.journal_seq())
+            self._journal.compact(self._journal.seq)
+        self._journal_sync_timer = QTimer(self)
+        self._journal_sync_timer.setSingleShot(True)
+        self._journal_sync_timer.setInterval(self.JOURNAL_SYNC_DELAY)
+        self._journal_sync_timer.timeout.connect(self._journal_sync_requested)
+
+        # Edits are written, and rows read for display, by a worker with its own
+        # connection, so that disk latency never blocks the GUI thread.
+        self._worker = StorageWorker(filename, self._journal)
+        self._write_requested.connect(self._worker.write)
+        self._read_requested.connect(self._worker.read)
+        self._snippets_requested.connect(self._worker.read_snippets)
+        self._journal_sync_requested.connect(self._worker.sync_journal)
+        self._import_requested.connect(self._worker.import_file)
+        self._worker.written.connect(self._on_written)
+        self._worker.write_failed.connect(self._on_write_failed)
+        self._worker.rows_read.connect(self._on_rows_read)
+        self._worker.snippets_read.connect(self._on_snippets_read)
+        self._worker.failed.connect(self.storage_failed)
+        self._worker.imported.connect(self.import_progress)
+        self._worker.import_finished.connect(self.import_finished)
+
+        # View row -> rowid, in table order, so that row lookups are rowid-keyed
+        # queries instead of LIMIT/OFFSET scans. Only the rows fetched so far are
+        # known; the rest are loaded a page at a time through fetchMore.
+        self._rowids: List[int] = []
+        # The same rowids, to skip rows fetched again after an edit moved them
+        # further down the sort order
+        self._listed: Set[int] = set()
+        self._all_fetched = False
+        self._data_version = 0
+        # Sort key of the last fetched row, from which the next page continues
+        self._last_key: Optional[Tuple[Any, int]] = None
+        # Order of the rows, as a key of exercise_store.SORT_KEYS, and a prefix the
+        # Author or Source of listed rows must start with. Both are applied by SQL.
+        self._order_by = "id"
+        self._descending = False
+        self._filter = ""
+        # Full-text query restricting the rows, and snippets of the rows matching it.
+        # Like summaries, snippets are read by the worker, once a row is shown.
+        self._search = ""
+        self._snippets: Dict[int, str] = {}
+        self._missing_snippets: Set[int] = set()
+
+        # Edits not yet written to the database, keyed by (rowid, column). They are
+        # coalesced and written in a single transaction once editing pauses for
+        # `flush_delay` milliseconds, at the latest MAX_FLUSH_DELAY milliseconds
+        # after the first of them, or when `flush` is called explicitly.
+        self._pending: Dict[Tuple[int, ExerciseColumns], str] = {}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_delay)
+        self._flush_timer.timeout.connect(self.flush)
+        self._max_flush_timer = QTimer(self)
+        self._max_flush_timer.setSingleShot(True)
+        self._max_flush_timer.setInterval(max(flush_delay, self.MAX_FLUSH_DELAY))
+        self._max_flush_timer.timeout.connect(self.flush)
+        # Edits handed to the worker, with the batch they were sent in, until the
+        # worker reports them written.
+        self._in_flight: Dict[Tuple[int, ExerciseColumns], Tuple[int, str]] = {}
+        self._batch = 0
+        self._batch_sent_at: Dict[int, float] = {}
+        # Keys of edits that needed no write, as they matched values in flight, by
+        # batch; with the time of the latest
+        self._batch_unchanged: Dict[
+            int, Tuple[Set[Tuple[int, ExerciseColumns]], float]
+        ] = {}
+        # Columns being edited whose values are only read when edits are flushed:
+        # (rowid, column) -> (row, function returning the value, or None if unchanged)
+        self._deferred: Dict[
+            Tuple[int, ExerciseColumns], Tuple[int, Callable[[], Optional[str]]]
+        ] = {}
+        # LRU cache of the latest full values read or written, so that edits are
+        # compared against them rather than against the database
+        self._values: "OrderedDict[Tuple[int, ExerciseColumns], str]" = OrderedDict()
+
+        # LRU cache of row summaries (see ExerciseStore.get_summaries), kept up to
+        # date with edits. data() only reads from it; missing rows are requested
+        # from the worker in one batch per event loop iteration, and show up
+        # through dataChanged once read. Full texts are never cached.
+        self._row_cache: "OrderedDict[int, Tuple[Any, ...]]" = OrderedDict()
+        self._missing_rows: Set[int] = set()
+        # Rows of the last page fetched, read ahead of being shown. Only the last
+        # page fetched before the read is sent is read, however many were fetched.
+        self._prefetch_rows: List[int] = []
+        self._read_timer = QTimer(self)
+        self._read_timer.setSingleShot(True)
+        self._read_timer.setInterval(0)
+        self._read_timer.timeout.connect(self._request_missing_rows)
 
-    def __del__(self):
-        self._db.close()
+        # LRU cache of measured size hints. Each (rowid, column) entry remembers the
+        # text hash and font key it was measured with, and is reused only if both
+        # still match.
+        self._size_hints: OrderedDict = OrderedDict()
+        self._font_metrics = None
+        self._font_metrics_key = ""
+
+        # Completion models over distinct column values, kept in sync by this model
+        self._unique_models: List[ExerciseModel.UniqueColumnModel] = []
+
+        self._closed = False
+        self._load_rows()
+
+    def close(self):
+        """Write pending edits and stop the storage thread."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._journal_sync_timer.stop()
+        QMetaObject.invokeMethod(self._worker, "close", Qt.BlockingQueuedConnection)
+        self._worker.wait()
+        QCoreApplication.sendPostedEvents(self, QEvent.MetaCall)
+        if self._journal is not None:
+            try:
+                if not self._pending:
+                    # Every edit journaled is now in the table
+                    self._journal.compact(self._journal.seq)
+                self._journal.close()
+            except OSError as e:
+                self.storage_failed.emit(str(e))
+        self._store.close()
+
+    def rowid(self, row: int) -> int:
+        """Return the rowid of a row, raising IndexError for rows not listed."""
+        if row < 0:
+            # Not counted from the end, as an invalid index has row -1
+            raise IndexError(row)
+        return self._rowids[row]
 
     def get_row(self, row: int):
-        return self._db.execute(
-            "SELECT * FROM FranklinExercise LIMIT 1 OFFSET ?;", (row,)
-        ).fetchone()
+        self._resolve_deferred()
+        rowid = self.rowid(row)
+        values = self._overlay_edits(rowid, self._store.get_row(rowid))
+        self._cache_values(rowid, ExerciseColumns, values)
+        return values
+
+    def get_values(
+        self, row: int, columns: Sequence[ExerciseColumns]
+    ) -> Tuple[str, ...]:
+        """Return the full values of some columns of a row, reading only those."""
+        self._resolve_deferred()
+        rowid = self.rowid(row)
+        values = self._overlay_edits(
+            rowid, self._store.get_values(rowid, columns), columns
+        )
+        self._cache_values(rowid, columns, values)
+        return values
+
+    def defer_data(
+        self, row: int, column: ExerciseColumns, read: Callable[[], Optional[str]]
+    ):
+        """Note an edit of a column, whose value is read with `read` only when edits
+        are flushed, or when the row is read.
+
+        `read` returns None if the value has not changed since it was last read.
+        """
+        rowid = self.rowid(row)
+        if (rowid, column) not in self._deferred:
+            self._touch_row(row)
+        self._deferred[(rowid, column)] = (row, read)
+        self._schedule_flush()
+
+    def journal_edit(
+        self, row: int, column: ExerciseColumns, position: int, removed: int, text: str
+    ):
+        """Journal replacing `removed` UTF-16 code units at `position` of a value
+        with `text`, ahead of the edited value being set or deferred."""
+        if self._journal is None:
+            return
+        self._journal.append(self.rowid(row), column, position, removed, text)
+        if not self._journal_sync_timer.isActive():
+            self._journal_sync_timer.start()
 
     def set_data(self, row: int, column: ExerciseColumns, value: str):
-        if self._get_value(column, row) != value:
-            self._set_value(column, row, value)
+        old_value = self._get_value(column, row)
+        if old_value != value:
+            self._update_unique_models(column, old_value, value)
+            rowid = self.rowid(row)
+            self._pending[(rowid, column)] = value
+            self._cache_values(rowid, (column,), (value,))
+            self._size_hints.pop((rowid, column), None)
+            cached = self._row_cache.get(rowid)
+            if cached is not None:
+                summary = list(cached)
+                if column in SUMMARY_COLUMNS:
+                    summary[SUMMARY_COLUMNS.index(column)] = self._summarize(
+                        column, value
+                    )
+                self._row_cache[rowid] = tuple(summary)
             index = self.createIndex(row, column.value)
             self.dataChanged.emit(index, index, (Qt.DisplayRole, Qt.SizeHintRole))
-            self._db.commit()
+            self._touch_row(row)
+            self._schedule_flush()
+        else:
+            self._settle_unchanged((self.rowid(row), column))
+
+    def reload_if_changed(self) -> bool:
+        """Reload the rows if another connection has committed to the database."""
+        if self._closed or self._store.data_version() == self._data_version:
+            return False
+        # The worker's own commits change data_version too, until their replies
+        # are taken
+        self.flush(wait=True)
+        if self._store.data_version() == self._data_version:
+            return False
+        self.beginResetModel()
+        self._row_cache.clear()
+        self._size_hints.clear()
+        self._values.clear()
+        self._load_rows()
+        self.endResetModel()
+        for model in self._unique_models:
+            model.reload()
+        return True
+
+    def clear_size_hints(self):
+        """Forget all measured size hints, e.g. after the font has changed."""
+        self._size_hints.clear()
+        self._font_metrics_key = ""
+
+    def set_search(self, text: str):
+        """Show only the rows matching `text`, best matches first.
+
+        An empty `text` shows all rows again.
+        """
+        search = search_query(text)
+        if search == self._search:
+            return
+        # The index must include every edit before it is queried
+        self.flush(wait=True)
+        self.beginResetModel()
+        self._search = search
+        self._load_rows()
+        self.endResetModel()
+
+    def set_filter(self, text: str):
+        """Show only the rows whose Author or Source starts with `text`."""
+        if text == self._filter:
+            return
+        self.flush(wait=True)
+        self.beginResetModel()
+        self._filter = text
+        self._load_rows()
+        self.endResetModel()
+
+    def import_file(self, path: str):
+        """Insert the records of a file or directory (see exercise_io.read_records)
+        on the storage thread.
+
+        The rows are not reloaded; once import_finished is emitted,
+        `reload_if_changed` shows the rows imported.
+        """
+        # The import must change data_version only after the replies to earlier
+        # writes are taken, for the rows to be reloaded
+        self.flush(wait=True)
+        self._import_requested.emit(path)
+
+    def set_flush_delay(self, msec: int):
+        self._flush_timer.setInterval(msec)
+        self._max_flush_timer.setInterval(max(msec, self.MAX_FLUSH_DELAY))
+
+    def flush(self, wait: bool = False):
+        """Send all pending edits to be written in one transaction.
+
+        With `wait`, return only once they are committed.
+        """
+        if self._closed:
+            return
+        self._resolve_deferred()
+        self._flush_timer.stop()
+        self._max_flush_timer.stop()
+        if self._pending:
+            self._batch += 1
+            self._batch_sent_at[self._batch] = time.perf_counter()
+            for key, value in self._pending.items():
+                self._in_flight[key] = (self._batch, value)
+            self._write_requested.emit(
+                self._batch,
+                list(self._pending.items()),
+                0 if self._journal is None else self._journal.seq,
+            )
+            self._pending.clear()
+        if wait and self._in_flight:
+            QMetaObject.invokeMethod(self._worker, "sync", Qt.BlockingQueuedConnection)
+            # Take the worker's replies now rather than on the next event loop pass
+            QCoreApplication.sendPostedEvents(self, QEvent.MetaCall)
 
     # Override
     def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
         if parent.isValid():
             return 0
-        return self._db.execute("SELECT COUNT (*) FROM FranklinExercise;").fetchone()[0]
+        return len(self._rowids)
+
+    # Override
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and not self._all_fetched
+
+    # Override
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        if parent.isValid() or self._all_fetched:
+            return
+        rowids = []
+        while not rowids and not self._all_fetched:
+            rowids = [
+                rowid
+                for rowid in self._query_rowids(self.PAGE_SIZE)
+                if rowid not in self._listed
+            ]
+        if rowids:
+            first = len(self._rowids)
+            self.beginInsertRows(parent, first, first + len(rowids) - 1)
+            self._rowids.extend(rowids)
+            self._listed.update(rowids)
+            self.endInsertRows()
+            self._prefetch(rowids)
 
     # Override
     def columnCount(self, __) -> int:
-        return len(ExerciseColumns)
+        return len(ExerciseColumns) + 1
 
     # Override
     def data(self, index: QModelIndex, role=Qt.DisplayRole) -> Any:
         if role == Qt.DisplayRole:
-            return self._get_value(ExerciseColumns(index.column()), index.row())
-        if role == Qt.SizeHintRole:
-            text = self._get_value(ExerciseColumns(index.column()), index.row())
-            size = QFontMetrics(self.parent().font()).boundingRect(text).size()
-            size = size.grownBy(QMargins(8, 8, 8, 8))
-            return size
+            if self._search and index.column() == ExerciseColumns.Original.value:
+                return self._snippet(index.row())
+            summary = self._cached_row(index.row())
+            if summary is None:
+                return ""
+            if index.column() == self.MODIFIED_COLUMN:
+                return QLocale().toString(
+                    QDateTime.fromSecsSinceEpoch(summary[-1]), QLocale.ShortFormat
+                )
+            column = ExerciseColumns(index.column())
+            if column in SUMMARY_COLUMNS:
+                return summary[SUMMARY_COLUMNS.index(column)]
+            return ""
+        if role == Qt.ToolTipRole and self._search:
+            return self._snippet(index.row())
+        if role == Qt.SizeHintRole and index.column() != self.MODIFIED_COLUMN:
+            return self._size_hint(ExerciseColumns(index.column()), index.row())
 
         return None
 
@@ -81,6 +433,10 @@ class ExerciseModel(QAbstractTableModel):
     ):
         if role == Qt.DisplayRole:
             if orientation == Qt.Horizontal:
+                if self._search and section == ExerciseColumns.Original.value:
+                    return "Match"
+                if section == self.MODIFIED_COLUMN:
+                    return "Modified"
                 return ExerciseColumns(section).name
             else:
                 return str(section + 1)
@@ -91,57 +447,399 @@ class ExerciseModel(QAbstractTableModel):
     def insertRow(self, row: int, parent: QModelIndex = QModelIndex()) -> bool:
         if parent.isValid() or row != self.rowCount():
             return False
+        # New rows are listed after the rows fetched so far, rather than after every
+        # row of the table, and skipped when fetched again
+        row = self.rowCount()
         self.beginInsertRows(parent, row, row)
-        self._db.execute("INSERT INTO FranklinExercise DEFAULT VALUES;")
+        rowid = self._store.insert()
+        self._rowids.append(rowid)
+        self._listed.add(rowid)
+        self._cache_row(rowid, ("",) * len(SUMMARY_COLUMNS) + (int(time.time()),))
         self.endInsertRows()
-        self._db.commit()
+        for model in self._unique_models:
+            model.add_value("")
         return True
 
     # Override
     def removeRow(self, row: int, parent: QModelIndex = QModelIndex()) -> bool:
-        if parent.isValid() or row >= self.rowCount():
+        if parent.isValid() or not 0 <= row < self.rowCount():
             return False
+        # Deferred edits refer to rows by position
+        self._resolve_deferred()
+        rowid = self.rowid(row)
+        old_values = [
+            (model, self._get_value(model.column, row)) for model in self._unique_models
+        ]
+        # Rowids are reused, so edits of the row must not be written after it is
+        # deleted: those pending are dropped, and those in flight committed first
+        for key in [key for key in self._pending if key[0] == rowid]:
+            del self._pending[key]
+        self.flush(wait=True)
+        for key in [key for key in self._in_flight if key[0] == rowid]:
+            del self._in_flight[key]
         self.beginRemoveRows(parent, row, row)
-        self._db.execute(
-            "DELETE FROM FranklinExercise WHERE rowid=(SELECT rowid FROM FranklinExercise LIMIT 1 OFFSET ?)",
-            (row,),
-        )
+        if self._journal is not None:
+            try:
+                self._journal.drop(rowid)
+            except OSError as e:
+                self.storage_failed.emit(str(e))
+        self._store.delete(rowid)
+        del self._rowids[row]
+        self._listed.discard(rowid)
+        for key in [key for key in self._pending if key[0] == rowid]:
+            del self._pending[key]
+        self._row_cache.pop(rowid, None)
+        for column in ExerciseColumns:
+            self._size_hints.pop((rowid, column), None)
+            self._values.pop((rowid, column), None)
         self.endRemoveRows()
-        self._db.commit()
+        for model, value in old_values:
+            model.remove_value(value)
         return True
 
+    # Override
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        """Order the rows by a column, or in table order if `column` is -1.
+
+        While searching, table order means best matches first.
+        """
+        if column < 0:
+            order_by = "id"
+        elif column == self.MODIFIED_COLUMN:
+            order_by = "Modified"
+        else:
+            order_by = ExerciseColumns(column).name
+        descending = order == Qt.DescendingOrder
+        if (order_by, descending) == (self._order_by, self._descending):
+            return
+        # Rows are ordered by their values in the database
+        self.flush(wait=True)
+        self.beginResetModel()
+        self._order_by, self._descending = order_by, descending
+        self._load_rows()
+        self.endResetModel()
+
+    def _load_rows(self):
+        self._data_version = self._store.data_version()
+        self._rowids = []
+        self._last_key = None
+        self._snippets = {}
+        self._missing_snippets = set()
+        if self._search:
+            # Ranking needs every match, so the result rows are loaded at once
+            self._all_fetched = True
+            self._rowids = self._store.search_rowids(
+                self._search,
+                None if self._order_by == "id" else self._order_by,
+                self._descending,
+                self._filter,
+            )
+        else:
+            self._all_fetched = False
+            self._rowids = self._query_rowids(self.PAGE_SIZE)
+        self._listed = set(self._rowids)
+        # The first page is read right away, so the view opens with its contents
+        for rowid, summary in self._store.get_summaries(self._rowids[: self.PAGE_SIZE]):
+            self._cache_row(rowid, self._overlay_summary(rowid, summary))
+
+    def _query_rowids(self, limit: int) -> List[int]:
+        """Return the next `limit` rowids after the last fetched row."""
+        keys = self._store.row_keys(
+            self._last_key, limit, self._order_by, self._descending, self._filter
+        )
+        if keys:
+            self._last_key = keys[-1]
+        if len(keys) < limit:
+            self._all_fetched = True
+        return [rowid for _, rowid in keys]
+
+    def _snippet(self, row: int) -> str:
+        """Return the snippet of a row if read, otherwise request it."""
+        rowid = self._rowids[row]
+        if rowid not in self._snippets:
+            # Shown empty until read, and requested once
+            self._snippets[rowid] = ""
+            self._missing_snippets.add(rowid)
+            self._read_timer.start()
+        return self._snippets[rowid]
+
+    def _update_unique_models(
+        self, column: ExerciseColumns, old_value: str, value: str
+    ):
+        for model in self._unique_models:
+            if model.column == column:
+                model.remove_value(old_value)
+                model.add_value(value)
+
+    def _size_hint(self, column: ExerciseColumns, row: int) -> Optional[QSize]:
+        if column not in SUMMARY_COLUMNS:
+            return None
+        key = (self._rowids[row], column)
+        summary = self._cached_row(row)
+        if summary is None:
+            return None
+        text = summary[SUMMARY_COLUMNS.index(column)]
+        font = self.parent().font()
+        text_hash, font_key = hash(text), font.key()
+
+        cached = self._size_hints.get(key)
+        if cached is not None and cached[:2] == (text_hash, font_key):
+            self._size_hints.move_to_end(key)
+            return cached[2]
+
+        if self._font_metrics_key != font_key:
+            self._font_metrics = QFontMetrics(font)
+            self._font_metrics_key = font_key
+        size = self._font_metrics.boundingRect(text).size()
+        size = size.grownBy(QMargins(8, 8, 8, 8))
+        self._size_hints[key] = (text_hash, font_key, size)
+        if len(self._size_hints) > self.SIZE_HINT_CACHE_SIZE:
+            self._size_hints.popitem(last=False)
+        return size
+
     def _get_value(self, column: ExerciseColumns, row: int) -> str:
-        return self._db.execute(
-            f"SELECT {column.name} FROM FranklinExercise LIMIT 1 OFFSET ?;", (row,)
-        ).fetchone()[0]
-
-    def _set_value(self, column: ExerciseColumns, row: int, value: str):
-        self._db.execute(
-            f"UPDATE FranklinExercise SET {column.name} = ? "
-            "WHERE rowid=(SELECT rowid FROM FranklinExercise LIMIT 1 OFFSET ?);",
-            (value, row),
+        rowid = self.rowid(row)
+        if (rowid, column) in self._pending:
+            return self._pending[(rowid, column)]
+        if (rowid, column) in self._in_flight:
+            return self._in_flight[(rowid, column)][1]
+        if (rowid, column) in self._values:
+            self._values.move_to_end((rowid, column))
+            return self._values[(rowid, column)]
+        # Summaries hold full values, except for the preview of Original
+        if (
+            rowid in self._row_cache
+            and column in SUMMARY_COLUMNS
+            and column != ExerciseColumns.Original
+        ):
+            return self._row_cache[rowid][SUMMARY_COLUMNS.index(column)]
+        return self._store.get_value(rowid, column)
+
+    def _cached_row(self, row: int) -> Optional[Tuple[Any, ...]]:
+        """Return the values of a row if cached, otherwise request them."""
+        rowid = self._rowids[row]
+        values = self._row_cache.get(rowid)
+        if values is None:
+            self._missing_rows.add(rowid)
+            self._read_timer.start()
+            return None
+        self._row_cache.move_to_end(rowid)
+        return values
+
+    def _cache_values(
+        self, rowid: int, columns: Sequence[ExerciseColumns], values: Sequence[Any]
+    ):
+        for column, value in zip(columns, values):
+            self._values[(rowid, column)] = value
+            self._values.move_to_end((rowid, column))
+        while len(self._values) > self.VALUE_CACHE_SIZE:
+            self._values.popitem(last=False)
+
+    def _resolve_deferred(self):
+        """Read the values of deferred edits, and make edits of those changed."""
+        deferred, self._deferred = self._deferred, {}
+        for (_, column), (row, read) in deferred.items():
+            value = read()
+            if value is not None:
+                self.set_data(row, column, value)
+            else:
+                self._settle_unchanged((self.rowid(row), column))
+
+    def _schedule_flush(self):
+        """Flush once editing pauses, but no later than MAX_FLUSH_DELAY from now if
+        no flush is due already."""
+        self._flush_timer.start()
+        if not self._max_flush_timer.isActive():
+            self._max_flush_timer.start()
+
+    def _settle_unchanged(self, key: Tuple[int, ExerciseColumns]):
+        """Report an edit that needs no write as written, once the value it left
+        as is is committed."""
+        if key in self._pending:
+            # Reported with the pending edit
+            return
+        now = time.perf_counter()
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            self.edits_written.emit([key], now)
+        else:
+            keys, _ = self._batch_unchanged.get(in_flight[0], (set(), now))
+            keys.add(key)
+            self._batch_unchanged[in_flight[0]] = (keys, now)
+
+    def _touch_row(self, row: int):
+        """Show a row as modified now."""
+        rowid = self.rowid(row)
+        cached = self._row_cache.get(rowid)
+        if cached is not None:
+            self._row_cache[rowid] = cached[:-1] + (int(time.time()),)
+        modified = self.createIndex(row, self.MODIFIED_COLUMN)
+        self.dataChanged.emit(modified, modified, (Qt.DisplayRole,))
+
+    def _cache_row(self, rowid: int, values: Tuple[Any, ...]):
+        self._row_cache[rowid] = values
+        self._row_cache.move_to_end(rowid)
+        while len(self._row_cache) > self.ROW_CACHE_SIZE:
+            self._row_cache.popitem(last=False)
+
+    def _overlay_edits(
+        self,
+        rowid: int,
+        values: Tuple[Any, ...],
+        columns: Sequence[ExerciseColumns] = tuple(ExerciseColumns),
+    ) -> Tuple[Any, ...]:
+        """Apply edits that are not yet written to values read from the database.
+
+        `values` starts with those of `columns`; any further values are kept as is.
+        """
+        return tuple(
+            self._pending.get(
+                (rowid, column), self._in_flight.get((rowid, column), (0, value))[1]
+            )
+            for column, value in zip(columns, values)
+        ) + tuple(values[len(columns) :])
+
+    def _overlay_summary(self, rowid: int, summary: Tuple[Any, ...]) -> Tuple[Any, ...]:
+        """Apply edits that are not yet written to a summary read from the database."""
+        summary = list(summary)
+        for i, column in enumerate(SUMMARY_COLUMNS):
+            key = (rowid, column)
+            if key in self._pending:
+                summary[i] = self._summarize(column, self._pending[key])
+            elif key in self._in_flight:
+                summary[i] = self._summarize(column, self._in_flight[key][1])
+        return tuple(summary)
+
+    @staticmethod
+    def _summarize(column: ExerciseColumns, value: str) -> str:
+        return preview(value) if column == ExerciseColumns.Original else value
+
+    def _prefetch(self, rowids: List[int]):
+        self._prefetch_rows = rowids
+        self._read_timer.start()
+
+    @slot()
+    def _request_missing_rows(self):
+        self._missing_rows.update(
+            rowid for rowid in self._prefetch_rows if rowid not in self._row_cache
         )
-        self._db.commit()
+        self._prefetch_rows = []
+        if self._missing_rows:
+            self._read_requested.emit(list(self._missing_rows))
+            self._missing_rows.clear()
+        if self._missing_snippets:
+            self._snippets_requested.emit(self._search, list(self._missing_snippets))
+            self._missing_snippets.clear()
+
+    @slot(list)
+    def _on_rows_read(self, rows: List[Tuple[int, Tuple[Any, ...]]]):
+        for rowid, summary in rows:
+            if rowid not in self._row_cache:
+                self._cache_row(rowid, self._overlay_summary(rowid, summary))
+        if rows and self._rowids:
+            # Views only repaint the visible part of the range
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self._rowids) - 1, self.MODIFIED_COLUMN),
+                (Qt.DisplayRole, Qt.SizeHintRole),
+            )
+
+    @slot(str, list)
+    def _on_snippets_read(self, query: str, snippets: List[Tuple[int, str]]):
+        if query != self._search:
+            return
+        # Rows added or edited since the search ran may no longer match
+        self._snippets.update(snippets)
+        if snippets and self._rowids:
+            column = ExerciseColumns.Original.value
+            self.dataChanged.emit(
+                self.index(0, column),
+                self.index(len(self._rowids) - 1, column),
+                (Qt.DisplayRole, Qt.ToolTipRole),
+            )
+
+    @slot(int)
+    def _on_written(self, batch: int):
+        keys = [key for key, (b, _) in self._in_flight.items() if b == batch]
+        for key in keys:
+            del self._in_flight[key]
+        self.edits_written.emit(keys, self._batch_sent_at.pop(batch))
+        if batch in self._batch_unchanged:
+            unchanged, made_at = self._batch_unchanged.pop(batch)
+            self.edits_written.emit(list(unchanged), made_at)
+        # The worker's commits are not changes made by somebody else
+        self._data_version = self._store.data_version()
+
+    @slot(int, str)
+    def _on_write_failed(self, batch: int, message: str):
+        # Keep the edits pending, so they are retried with the next flush
+        del self._batch_sent_at[batch]
+        # Now pending, and reported with the pending edits
+        self._batch_unchanged.pop(batch, None)
+        for key in [key for key, (b, _) in self._in_flight.items() if b == batch]:
+            self._pending.setdefault(key, self._in_flight.pop(key)[1])
+        self.write_failed.emit(message)
 
     class UniqueColumnModel(QAbstractListModel):
+        """Sorted distinct values of a column, for completers.
+
+        The values are held in memory, sorted case-insensitively, and updated
+        incrementally by the parent model as rows change.
+        """
+
         def __init__(self, parent_model, column) -> None:
             super().__init__(parent=parent_model)
-            self._db = parent_model._db
-            self._column = column
+            self._store = parent_model._store
+            self.column = column
+            # Number of rows holding each value; a value is listed while its count > 0
+            self._counts: Dict[str, int] = {}
+            # (sort key, value) pairs in sorted order
+            self._entries: List[Tuple[str, str]] = []
+            self._load()
+            parent_model._unique_models.append(self)
 
-        def rowCount(self, parent: QModelIndex) -> int:
+        def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
             if parent.isValid():
                 return 0
-            return self._db.execute(
-                f"SELECT COUNT (DISTINCT {self._column.name}) FROM FranklinExercise"
-            ).fetchone()[0]
+            return len(self._entries)
 
         def data(self, index: QModelIndex, role: int):
             if role == Qt.DisplayRole:
-                col = self._column.name
-                return self._db.execute(
-                    f"SELECT T.{col} FROM (SELECT DISTINCT {col} FROM FranklinExercise "
-                    f"ORDER BY {col}) AS T LIMIT 1 OFFSET ?",
-                    (index.row(),),
-                ).fetchone()[0]
+                return self._entries[index.row()][1]
             return None
+
+        def reload(self):
+            self.beginResetModel()
+            self._load()
+            self.endResetModel()
+
+        def add_value(self, value: str):
+            count = self._counts.get(value, 0)
+            self._counts[value] = count + 1
+            if count == 0:
+                entry = (self._sort_key(value), value)
+                row = bisect.bisect_left(self._entries, entry)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._entries.insert(row, entry)
+                self.endInsertRows()
+
+        def remove_value(self, value: str):
+            count = self._counts.get(value, 0)
+            if count > 1:
+                self._counts[value] = count - 1
+            elif count == 1:
+                del self._counts[value]
+                row = bisect.bisect_left(self._entries, (self._sort_key(value), value))
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._entries[row]
+                self.endRemoveRows()
+
+        def _load(self):
+            self._counts = self._store.distinct_counts(self.column)
+            self._entries = sorted(
+                (self._sort_key(value), value) for value in self._counts
+            )
+
+        @staticmethod
+        def _sort_key(value: str) -> str:
+            return value.lower()
@@ -0,0 +1,640 @@
+import enum
+import os
+import pathlib
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import appdirs
+
+from franklin_writing_exercise.sql_trace import TracingConnection
+
+# This module must not import Qt: the command line tool depends on it alone.
+
+
+@enum.unique
+class ExerciseColumns(enum.Enum):
+    Author = 0
+    Source = 1
+    Original = 2
+    Notes = 3
+    Rewrite = 4
+    Correction = 5
+    Poetry = 6
+    Prose = 7
+
+
+@enum.unique
+class StorageProfile(enum.Enum):
+    """Connection settings trading durability for speed."""
+
+    # Every commit is synced to disk before it returns
+    Durable = "durable"
+    # Commits are synced at WAL checkpoints: a power loss may drop the last few,
+    # but never corrupts the database
+    Fast = "fast"
+
+
+STORAGE_PROFILE_PRAGMAS: Dict[StorageProfile, Dict[str, Any]] = {
+    StorageProfile.Durable: {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -8192,
+        "temp_store": "DEFAULT",
+    },
+    StorageProfile.Fast: {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -65536,
+        "temp_store": "MEMORY",
+    },
+}
+
+# Environment variable selecting the storage profile by name
+STORAGE_PROFILE_ENV = "FRANKLIN_STORAGE_PROFILE"
+
+
+def default_storage_profile() -> StorageProfile:
+    return StorageProfile(os.environ.get(STORAGE_PROFILE_ENV, "durable").lower())
+
+
+# Version of the schema created by this module, kept in PRAGMA user_version.
+# Version 0 is the unversioned table of the first releases, keyed by implicit rowid.
+SCHEMA_VERSION = 5
+
+# Default of the Created and Modified columns: seconds since the Unix epoch
+_NOW = "CAST(strftime('%s','now') AS INTEGER)"
+
+# Number of rowids bound to one statement, below the SQLITE_MAX_VARIABLE_NUMBER of
+# older SQLite versions
+_ROWID_CHUNK_SIZE = 500
+
+# Number of characters of the Original text kept as its preview
+PREVIEW_LENGTH = 100
+
+# Columns of the summaries listed in the exercise table. Original is summarized
+# by its preview, and a summary ends with the Modified time.
+SUMMARY_COLUMNS = (
+    ExerciseColumns.Author,
+    ExerciseColumns.Source,
+    ExerciseColumns.Original,
+)
+
+# Orders the rows can be listed in, and the expression each one sorts by. Text
+# sorts ignore ASCII case, like the case-insensitive indexes on Author, Source and
+# Preview. Original sorts by its indexed preview, as it is shown in the table.
+SORT_KEYS = {
+    "id": "id",
+    **{col.name: f"{col.name} COLLATE NOCASE" for col in ExerciseColumns},
+    "Original": "Preview COLLATE NOCASE",
+    "Created": "Created",
+    "Modified": "Modified",
+}
+
+
+def default_database_path() -> pathlib.Path:
+    data_dir = pathlib.Path(appdirs.user_data_dir("franklin_writing_exercise"))
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir / "exercises.db"
+
+
+def preview(text: str) -> str:
+    """Return the first line of `text`, shortened to PREVIEW_LENGTH characters.
+
+    The same as the Preview column computes in SQL.
+    """
+    line = text.lstrip("\t\n\r ").split("\n", 1)[0].rstrip("\r")
+    if len(line) > PREVIEW_LENGTH:
+        return line[: PREVIEW_LENGTH - 1] + "…"
+    return line
+
+
+def _preview_sql(value: str) -> str:
+    """Return the SQL expression of `preview` applied to `value`."""
+    text = f"ltrim({value},char(9,10,13,32))"
+    line = f"rtrim(substr({text},1,instr({text}||char(10),char(10))-1),char(13))"
+    return (
+        f"CASE WHEN length({line})>{PREVIEW_LENGTH} "
+        f"THEN substr({line},1,{PREVIEW_LENGTH - 1})||'…' ELSE {line} END"
+    )
+
+
+def _rowid_chunks(rowids: Sequence[int]) -> Iterator[Tuple[Sequence[int], str]]:
+    """Split `rowids` into chunks small enough to bind to one statement, each with
+    its "?,?,…" placeholders."""
+    for start in range(0, len(rowids), _ROWID_CHUNK_SIZE):
+        chunk = rowids[start : start + _ROWID_CHUNK_SIZE]
+        yield chunk, ",".join("?" for _ in chunk)
+
+
+def search_query(text: str) -> str:
+    """Turn user input into an FTS5 query on FranklinExerciseSearch.
+
+    Every word of `text` must occur in some column; the last word may be incomplete.
+    """
+    words = text.split()
+    query = " ".join('"' + word.replace('"', '""') + '"' for word in words)
+    if query:
+        query += "*"
+    return query
+
+
+class ExerciseStore:
+    """SQLite storage of the exercises, addressed by rowid."""
+
+    def __init__(self, filename: str, profile: Optional[StorageProfile] = None):
+        self._filename = filename
+        self._profile = profile or default_storage_profile()
+
+        # Statements are traced while sql_trace.TRACER is enabled
+        self._db = TracingConnection(sqlite3.connect(self._filename))
+        self._settings = self._apply_profile()
+        self._migrate()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self._db
+
+    @property
+    def profile(self) -> StorageProfile:
+        return self._profile
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """The connection settings in effect, as reported by SQLite."""
+        return self._settings
+
+    def close(self):
+        self._db.close()
+
+    def schema_version(self) -> int:
+        return self._db.execute("PRAGMA user_version;").fetchone()[0]
+
+    def data_version(self) -> int:
+        """Return a number that changes when another connection commits."""
+        return self._db.execute("PRAGMA data_version;").fetchone()[0]
+
+    def row_keys(
+        self,
+        after: Optional[Tuple[Any, int]],
+        limit: int,
+        order_by: str = "id",
+        descending: bool = False,
+        prefix: str = "",
+    ) -> List[Tuple[Any, int]]:
+        """Return up to `limit` (sort key, rowid) pairs, starting after `after`.
+
+        Rows are ordered by SORT_KEYS[`order_by`], then rowid. With `prefix`, only
+        rows whose Author or Source starts with it, ignoring case, are listed.
+        Every page is a range scan on an index, however deep into the table.
+        """
+        key = SORT_KEYS[order_by]
+        where, params = self._prefix_filter(prefix)
+        if after is not None:
+            cmp = "<" if descending else ">"
+            where.append(f"{key} {cmp}= ? AND ({key} {cmp} ? OR id {cmp} ?)")
+            params.extend((after[0], after[0], after[1]))
+        direction = "DESC" if descending else "ASC"
+        return self._db.execute(
+            f"SELECT {key}, id FROM FranklinExercise "
+            + (f"WHERE {' AND '.join(where)} " if where else "")
+            + f"ORDER BY {key} {direction}, id {direction} LIMIT ?;",
+            (*params, limit),
+        ).fetchall()
+
+    def search_rowids(
+        self,
+        query: str,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        prefix: str = "",
+    ) -> List[int]:
+        """Return the rowids matching the FTS5 `query`.
+
+        Best matches come first, unless ordered by SORT_KEYS[`order_by`]. `prefix`
+        filters the rows as in `row_keys`.
+        """
+        where, params = self._prefix_filter(prefix)
+        if order_by is None:
+            order = "found.rank"
+        else:
+            direction = "DESC" if descending else "ASC"
+            order = f"{SORT_KEYS[order_by]} {direction}, id {direction}"
+        return [
+            rowid
+            for (rowid,) in self._db.execute(
+                "SELECT id FROM FranklinExercise JOIN ("
+                "SELECT rowid, rank FROM FranklinExerciseSearch "
+                "WHERE FranklinExerciseSearch MATCH ?"
+                ") AS found ON id = found.rowid "
+                + (f"WHERE {' AND '.join(where)} " if where else "")
+                + f"ORDER BY {order};",
+                (query, *params),
+            )
+        ]
+
+    def snippets(self, query: str, rowids: Sequence[int]) -> Dict[int, str]:
+        """Return the text around the match of `query` in each of the given rows
+        that match it, by rowid.
+
+        The matches are scanned once, and snippets made only for the given rows:
+        looking rows up by rowid merges the doclists of a prefix query again for
+        each of them.
+        """
+        found = {}
+        for chunk, placeholders in _rowid_chunks(rowids):
+            found.update(
+                row
+                for row in self._db.execute(
+                    f"SELECT rowid, CASE WHEN rowid IN ({placeholders}) THEN "
+                    "snippet(FranklinExerciseSearch, -1, '[', ']', '…', 12) END "
+                    "FROM FranklinExerciseSearch WHERE FranklinExerciseSearch MATCH ? "
+                    "AND rowid BETWEEN ? AND ?;",
+                    (*chunk, query, min(chunk), max(chunk)),
+                )
+                if row[1] is not None
+            )
+        return found
+
+    def iter_rows(self, columns: Sequence[ExerciseColumns]) -> Iterator[Tuple]:
+        """Yield (rowid, *values) of the selected `columns` for every row."""
+        selected = ",".join(col.name for col in columns)
+        yield from self._db.execute(
+            f"SELECT rowid,{selected} FROM FranklinExercise ORDER BY rowid;"
+        )
+
+    def iter_summaries(self) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+        """Yield (rowid, summary) of every row, as `get_summaries` returns them."""
+        for row in self._db.execute(
+            "SELECT rowid,Author,Source,Preview,Modified FROM FranklinExercise "
+            "ORDER BY rowid;"
+        ):
+            yield row[0], row[1:]
+
+    def get_row(self, rowid: int) -> Tuple[Any, ...]:
+        """Return the values of ExerciseColumns, then the Modified time, of a row."""
+        columns = ",".join(col.name for col in ExerciseColumns) + ",Modified"
+        return self._db.execute(
+            f"SELECT {columns} FROM FranklinExercise WHERE rowid=?;", (rowid,)
+        ).fetchone()
+
+    def get_summaries(self, rowids: Sequence[int]) -> List[Tuple[int, Tuple[Any, ...]]]:
+        """Return (rowid, summary) of those of the given rows that exist.
+
+        A summary holds the values of SUMMARY_COLUMNS, then the Modified time. Full
+        Original texts are not read.
+        """
+        columns = "Author,Source,Preview,Modified"
+        rows = []
+        for chunk, placeholders in _rowid_chunks(rowids):
+            rows.extend(
+                (row[0], row[1:])
+                for row in self._db.execute(
+                    f"SELECT rowid,{columns} FROM FranklinExercise "
+                    f"WHERE rowid IN ({placeholders});",
+                    tuple(chunk),
+                )
+            )
+        return rows
+
+    def get_values(
+        self, rowid: int, columns: Sequence[ExerciseColumns]
+    ) -> Tuple[str, ...]:
+        """Return the values of only the given `columns` of a row."""
+        selected = ",".join(col.name for col in columns)
+        return self._db.execute(
+            f"SELECT {selected} FROM FranklinExercise WHERE rowid=?;", (rowid,)
+        ).fetchone()
+
+    def get_value(self, rowid: int, column: ExerciseColumns) -> str:
+        return self._db.execute(
+            f"SELECT {column.name} FROM FranklinExercise WHERE rowid=?;", (rowid,)
+        ).fetchone()[0]
+
+    def insert(self, values: Optional[Dict[ExerciseColumns, str]] = None) -> int:
+        """Add an exercise and return its rowid."""
+        with self._db:
+            if values:
+                columns = [col.name for col in values]
+                params = list(values.values())
+                if ExerciseColumns.Original in values:
+                    columns.append("Preview")
+                    params.append(preview(values[ExerciseColumns.Original]))
+                placeholders = ",".join("?" for _ in params)
+                cursor = self._db.execute(
+                    f"INSERT INTO FranklinExercise ({','.join(columns)}) "
+                    f"VALUES ({placeholders});",
+                    params,
+                )
+            else:
+                cursor = self._db.execute(
+                    "INSERT INTO FranklinExercise DEFAULT VALUES;"
+                )
+        return cursor.lastrowid
+
+    def journal_seq(self) -> int:
+        """Return the sequence number of the last edit journal entry whose effect is
+        written to the table (see edit_journal)."""
+        return self._db.execute("SELECT seq FROM FranklinJournal;").fetchone()[0]
+
+    def delete(self, rowid: int):
+        with self._db:
+            self._db.execute("DELETE FROM FranklinExercise WHERE rowid=?;", (rowid,))
+
+    def update(
+        self,
+        values: Iterable[Tuple[Tuple[int, ExerciseColumns], str]],
+        journal_seq: int = 0,
+    ):
+        """Write ((rowid, column), value) pairs in a single transaction.
+
+        A non-zero `journal_seq` is the last edit journal entry the values include.
+        """
+        with self._db:
+            if journal_seq:
+                self._db.execute(
+                    "UPDATE FranklinJournal SET seq = MAX(seq, ?);", (journal_seq,)
+                )
+            for (rowid, column), value in values:
+                if column == ExerciseColumns.Original:
+                    self._db.execute(
+                        "UPDATE FranklinExercise SET Original = ?, Preview = ?, "
+                        f"Modified = {_NOW} WHERE rowid=?;",
+                        (value, preview(value), rowid),
+                    )
+                else:
+                    self._db.execute(
+                        f"UPDATE FranklinExercise SET {column.name} = ?, "
+                        f"Modified = {_NOW} WHERE rowid=?;",
+                        (value, rowid),
+                    )
+
+    def distinct_counts(self, column: ExerciseColumns) -> Dict[str, int]:
+        """Return the number of rows holding each value of `column`."""
+        col = column.name
+        return dict(
+            self._db.execute(
+                f"SELECT {col}, COUNT (*) FROM FranklinExercise GROUP BY {col};"
+            )
+        )
+
+    @staticmethod
+    def _prefix_filter(prefix: str) -> Tuple[List[str], List[str]]:
+        """Return the WHERE conditions and parameters of a prefix filter.
+
+        Written as ranges, so that they are looked up in the NOCASE indexes.
+        """
+        if not prefix:
+            return [], []
+        return (
+            [
+                "(Author COLLATE NOCASE >= ? AND Author COLLATE NOCASE < ? OR "
+                "Source COLLATE NOCASE >= ? AND Source COLLATE NOCASE < ?)"
+            ],
+            [prefix, prefix + "\U0010ffff"] * 2,
+        )
+
+    def _apply_profile(self) -> Dict[str, Any]:
+        """Apply the profile's pragmas and return the settings SQLite reports back."""
+        settings = {}
+        for pragma, value in STORAGE_PROFILE_PRAGMAS[self._profile].items():
+            self._db.execute(f"PRAGMA {pragma} = {value};")
+            row = self._db.execute(f"PRAGMA {pragma};").fetchone()
+            # In-memory databases report nothing for some pragmas
+            settings[pragma] = row[0] if row else None
+        return settings
+
+    def _migrate(self):
+        """Bring the database to SCHEMA_VERSION, in a single transaction.
+
+        An existing database is backed up next to the original first.
+        """
+        version = self.schema_version()
+        if version > SCHEMA_VERSION:
+            raise ValueError(
+                f"database schema {version} is newer than this program "
+                f"supports ({SCHEMA_VERSION})"
+            )
+        if version == SCHEMA_VERSION:
+            return
+
+        exists = self._table_exists("FranklinExercise")
+        if exists:
+            self._backup(version)
+        with self._db:
+            # Take the write lock before looking again, in case another
+            # connection migrated in the meantime
+            self._db.execute("BEGIN IMMEDIATE;")
+            version = self.schema_version()
+            if version == SCHEMA_VERSION:
+                return
+            if not self._table_exists("FranklinExercise"):
+                self._create_schema()
+            else:
+                for migration in MIGRATIONS[version:]:
+                    migration(self._db)
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
+
+    def _backup(self, version: int):
+        if self._filename in ("", ":memory:"):
+            return
+        backup = sqlite3.connect(f"{self._filename}.schema{version}.bak")
+        try:
+            self._db.backup(backup)
+        finally:
+            backup.close()
+
+    def _table_exists(self, name: str) -> bool:
+        return bool(
+            self._db.execute(
+                "SELECT 1 FROM sqlite_master WHERE name=?;", (name,)
+            ).fetchone()
+        )
+
+    def _create_schema(self):
+        """Create the tables and indexes of SCHEMA_VERSION in an empty database."""
+        _create_table(self._db, "FranklinExercise")
+        _create_indexes(self._db)
+        _create_preview_index(self._db)
+        _create_search_index(self._db)
+        _create_preview_triggers(self._db)
+        _create_journal_table(self._db)
+
+
+def _create_table(db: sqlite3.Connection, name: str):
+    # Short columns come first: reading a column means reading past the
+    # overflow pages of all long texts stored before it.
+    long_columns = [
+        col
+        for col in ExerciseColumns
+        if col not in (ExerciseColumns.Author, ExerciseColumns.Source)
+    ]
+    db.execute(
+        f"CREATE TABLE {name} (id INTEGER PRIMARY KEY,"
+        "Author TEXT NOT NULL DEFAULT '',"
+        "Source TEXT NOT NULL DEFAULT '',"
+        "Preview TEXT NOT NULL DEFAULT '',"
+        f"Created INTEGER NOT NULL DEFAULT ({_NOW}),"
+        f"Modified INTEGER NOT NULL DEFAULT ({_NOW}),"
+        + ",".join(col.name + " TEXT NOT NULL DEFAULT ''" for col in long_columns)
+        + ");"
+    )
+
+
+def _create_indexes(db: sqlite3.Connection):
+    for column in ("Author", "Source"):
+        db.execute(
+            f"CREATE INDEX FranklinExercise{column} "
+            f"ON FranklinExercise ({column} COLLATE NOCASE);"
+        )
+    db.execute("CREATE INDEX FranklinExerciseModified ON FranklinExercise (Modified);")
+
+
+def _migrate_to_keyed(db: sqlite3.Connection):
+    """Version 0 to 1: key rows by id, add timestamps and indexes.
+
+    Ids are the old rowids, which VACUUM could renumber until now.
+    """
+    for trigger in ("Insert", "Delete", "Update"):
+        db.execute(f"DROP TRIGGER IF EXISTS FranklinExerciseSearch{trigger};")
+    db.execute("DROP TABLE IF EXISTS FranklinExerciseSearch;")
+    db.execute("ALTER TABLE FranklinExercise RENAME TO FranklinExerciseV0;")
+    db.execute(
+        "CREATE TABLE FranklinExercise (id INTEGER PRIMARY KEY,"
+        + ",".join(col.name + " TEXT NOT NULL DEFAULT ''" for col in ExerciseColumns)
+        + f",Created INTEGER NOT NULL DEFAULT ({_NOW})"
+        + f",Modified INTEGER NOT NULL DEFAULT ({_NOW}));"
+    )
+    for column in ("Author", "Source"):
+        db.execute(
+            f"CREATE INDEX FranklinExercise{column} ON FranklinExercise ({column});"
+        )
+    _create_search_index(db)
+    columns = ",".join(col.name for col in ExerciseColumns)
+    values = ",".join(f"IFNULL({col.name},'')" for col in ExerciseColumns)
+    db.execute(
+        f"INSERT INTO FranklinExercise (id,{columns}) "
+        f"SELECT rowid,{values} FROM FranklinExerciseV0;"
+    )
+    db.execute("DROP TABLE FranklinExerciseV0;")
+    db.execute(
+        "INSERT INTO FranklinExerciseSearch(FranklinExerciseSearch) "
+        "VALUES ('rebuild');"
+    )
+
+
+def _migrate_to_sort_indexes(db: sqlite3.Connection):
+    """Version 1 to 2: index the sort orders of the exercise table."""
+    db.execute("DROP INDEX FranklinExerciseAuthor;")
+    db.execute("DROP INDEX FranklinExerciseSource;")
+    _create_indexes(db)
+
+
+def _migrate_to_summaries(db: sqlite3.Connection):
+    """Version 2 to 3: add the Preview column, ahead of the long texts.
+
+    The table is copied to reorder its columns. Ids are kept, so the search
+    index stays valid and only its triggers are recreated.
+    """
+    _create_table(db, "FranklinExerciseV3")
+    columns = ",".join(col.name for col in ExerciseColumns)
+    db.execute(
+        f"INSERT INTO FranklinExerciseV3 (id,{columns},Created,Modified,Preview) "
+        f"SELECT id,{columns},Created,Modified,{_preview_sql('Original')} "
+        "FROM FranklinExercise;"
+    )
+    # Also drops the indexes and triggers on the table
+    db.execute("DROP TABLE FranklinExercise;")
+    db.execute("ALTER TABLE FranklinExerciseV3 RENAME TO FranklinExercise;")
+    _create_indexes(db)
+    _create_search_triggers(db)
+    _create_preview_triggers(db)
+
+
+def _migrate_to_journal(db: sqlite3.Connection):
+    """Version 3 to 4: track the edit journal entries written to the table."""
+    _create_journal_table(db)
+
+
+def _create_journal_table(db: sqlite3.Connection):
+    db.execute(
+        "CREATE TABLE FranklinJournal "
+        "(id INTEGER PRIMARY KEY CHECK (id = 0), seq INTEGER NOT NULL);"
+    )
+    db.execute("INSERT INTO FranklinJournal VALUES (0, 0);")
+
+
+def _migrate_to_preview_index(db: sqlite3.Connection):
+    """Version 4 to 5: index the order of Preview, by which Original sorts."""
+    _create_preview_index(db)
+
+
+def _create_preview_index(db: sqlite3.Connection):
+    db.execute(
+        "CREATE INDEX FranklinExercisePreview "
+        "ON FranklinExercise (Preview COLLATE NOCASE);"
+    )
+
+
+def _create_preview_triggers(db: sqlite3.Connection):
+    """Create the triggers keeping Preview up to date with Original.
+
+    Writers should set Preview themselves: a trigger fixing it rewrites the
+    whole row, long texts included.
+    """
+    expected = _preview_sql("new.Original")
+    for trigger, event in (("Insert", "INSERT"), ("Update", "UPDATE OF Original")):
+        db.execute(
+            f"CREATE TRIGGER FranklinExercisePreview{trigger} "
+            f"AFTER {event} ON FranklinExercise "
+            f"WHEN new.Preview <> {expected} BEGIN "
+            f"UPDATE FranklinExercise SET Preview = {expected} "
+            "WHERE id = new.id; END;"
+        )
+
+
+def _create_search_index(db: sqlite3.Connection):
+    """Create the FTS5 index over FranklinExercise and its sync triggers."""
+    columns = ",".join(col.name for col in ExerciseColumns)
+    db.execute(
+        f"CREATE VIRTUAL TABLE FranklinExerciseSearch USING fts5({columns}, "
+        "content='FranklinExercise', content_rowid='id');"
+    )
+    _create_search_triggers(db)
+
+
+def _create_search_triggers(db: sqlite3.Connection):
+    columns = ",".join(col.name for col in ExerciseColumns)
+    new_values = ",".join("new." + col.name for col in ExerciseColumns)
+    old_values = ",".join("old." + col.name for col in ExerciseColumns)
+    delete = "INSERT INTO FranklinExerciseSearch(FranklinExerciseSearch,rowid,"
+    db.execute(
+        "CREATE TRIGGER FranklinExerciseSearchInsert "
+        "AFTER INSERT ON FranklinExercise BEGIN "
+        f"INSERT INTO FranklinExerciseSearch(rowid,{columns}) "
+        f"VALUES (new.id,{new_values}); END;"
+    )
+    db.execute(
+        "CREATE TRIGGER FranklinExerciseSearchDelete "
+        "AFTER DELETE ON FranklinExercise BEGIN "
+        f"{delete}{columns}) VALUES ('delete',old.id,{old_values}); END;"
+    )
+    # Only reindex when the text changes, not the timestamps
+    db.execute(
+        "CREATE TRIGGER FranklinExerciseSearchUpdate "
+        f"AFTER UPDATE OF {columns} ON FranklinExercise BEGIN "
+        f"{delete}{columns}) VALUES ('delete',old.id,{old_values}); "
+        f"INSERT INTO FranklinExerciseSearch(rowid,{columns}) "
+        f"VALUES (new.id,{new_values}); END;"
+    )
+
+
+# MIGRATIONS[n] brings a database from schema version n to n + 1
+MIGRATIONS = [
+    _migrate_to_keyed,
+    _migrate_to_sort_indexes,
+    _migrate_to_summaries,
+    _migrate_to_journal,
+    _migrate_to_preview_index,
+]
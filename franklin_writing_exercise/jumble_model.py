@@ -0,0 +1,116 @@
+import functools
+import random
+import zlib
+from array import array
+from typing import Any, Sequence
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtGui import QColor
+
+
+# Number of distinct lines whose colors are kept
+LINE_COLOR_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=LINE_COLOR_CACHE_SIZE)
+def line_color(line: str) -> QColor:
+    """Return a light color for `line`, the same for equal lines in every session."""
+    # hash() of a str is salted per process; CRC-32 is stable and fast
+    hashed = zlib.crc32(line.encode("utf-8"))
+    hue = (hashed & 0xFF) / 0xFF
+    sat = ((hashed >> 8) & 0xFF) / 0xFF * 0.8
+    lit = ((hashed >> 16) & 0xFF) / 0xFF * 0.4 + 0.6
+    return QColor.fromHslF(hue, sat, lit)
+
+
+class JumbleModel(QAbstractListModel):
+    """Lines of text, listed in an order kept as an array of line indices.
+
+    Shuffling, revealing and moving lines only permute the indices: no per-line
+    objects are created, and views are updated with a single signal.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent=parent)
+        self._lines: Sequence[str] = ()
+        # Index into _lines of the line shown at each row
+        self._order = array("L")
+        # Whether lines are shown in the colors matching them across views
+        self._colored = False
+
+    def set_lines(self, lines: Sequence[str]):
+        """List `lines` in their order, uncolored."""
+        self.beginResetModel()
+        self._lines = lines
+        self._order = array("L", range(len(lines)))
+        self._colored = False
+        self.endResetModel()
+
+    def shuffle(self):
+        """Put the lines in a random order, uncolored."""
+        random.shuffle(self._order)
+        self._colored = False
+        self._emit_all_changed()
+
+    def set_colored(self, colored: bool):
+        if colored != self._colored:
+            self._colored = colored
+            self._emit_all_changed()
+
+    # Override
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._order)
+
+    # Override
+    def data(self, index: QModelIndex, role=Qt.DisplayRole) -> Any:
+        if role == Qt.DisplayRole:
+            return self._lines[self._order[index.row()]]
+        if role == Qt.BackgroundRole and self._colored:
+            return line_color(self._lines[self._order[index.row()]])
+        return None
+
+    # Override
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        flags = super().flags(index)
+        if index.isValid():
+            return flags | Qt.ItemIsDragEnabled
+        return flags | Qt.ItemIsDropEnabled
+
+    # Override
+    def supportedDropActions(self) -> Qt.DropActions:
+        return Qt.MoveAction
+
+    # Override
+    def moveRows(
+        self,
+        source_parent: QModelIndex,
+        source_row: int,
+        count: int,
+        destination_parent: QModelIndex,
+        destination_child: int,
+    ) -> bool:
+        """Move lines within the list; views reorder them by drag and drop."""
+        if source_parent.isValid() or destination_parent.isValid():
+            return False
+        last = source_row + count - 1
+        if not self.beginMoveRows(
+            source_parent, source_row, last, destination_parent, destination_child
+        ):
+            return False
+        moved = self._order[source_row : last + 1]
+        del self._order[source_row : last + 1]
+        if destination_child > source_row:
+            destination_child -= count
+        self._order[destination_child:destination_child] = moved
+        self.endMoveRows()
+        return True
+
+    def _emit_all_changed(self):
+        if self._order:
+            self.dataChanged.emit(
+                self.index(0),
+                self.index(len(self._order) - 1),
+                (Qt.DisplayRole, Qt.BackgroundRole),
+            )
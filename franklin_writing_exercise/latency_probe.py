@@ -0,0 +1,143 @@
+import bisect
+import collections
+import json
+import time
+from typing import Any, Deque, Dict, Hashable, Iterable, List, Optional, TextIO, Tuple
+
+# Environment variable naming a file to record the keypresses of a session to
+RECORD_SESSION_ENV = "FRANKLIN_RECORD_SESSION"
+# Upper bounds of the histogram buckets, in milliseconds; a last bucket holds the
+# rest. Edits are written once typing pauses, so most latencies are around a
+# second.
+BUCKET_BOUNDS_MS = tuple(2**i for i in range(-2, 15))
+# Number of latest latencies kept per histogram for percentiles
+SAMPLE_SIZE = 10000
+
+
+class LatencyHistogram:
+    def __init__(self, sample_size: Optional[int] = SAMPLE_SIZE):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.samples: Deque[float] = collections.deque(maxlen=sample_size)
+
+    def add(self, latency_ms: float):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, latency_ms)] += 1
+        self.samples.append(latency_ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.samples.extend(other.samples)
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sorted(self.samples)
+
+        def percentile(fraction: float) -> float:
+            return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+        return {
+            "count": sum(self.counts),
+            "p50_ms": percentile(0.5),
+            "p90_ms": percentile(0.9),
+            "p99_ms": percentile(0.99),
+            "max_ms": samples[-1],
+            "buckets": [
+                {"le_ms": bound, "count": count}
+                for bound, count in zip(BUCKET_BOUNDS_MS + (None,), self.counts)
+                if count
+            ],
+        }
+
+
+class LatencyProbe:
+    """Measures the time from a keypress in an editor until its edit is committed.
+
+    Each keypress that changes a value is registered with `edited`, keyed like the
+    edits of ExerciseModel, and measured once `persisted` reports an edit of that
+    key committed after being sent at or after the keypress.
+    """
+
+    def __init__(self):
+        # Keypresses not yet committed: key -> [(time, editor, step)]
+        self._pending: Dict[Hashable, List[Tuple[float, str, str]]] = {}
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def edited(self, key: Hashable, pressed_at: float, editor: str, step: str):
+        """Register a keypress at `pressed_at`, a time.perf_counter() value."""
+        self._pending.setdefault(key, []).append((pressed_at, editor, step))
+
+    def persisted(self, keys: Iterable[Hashable], sent_at: float):
+        """Measure the keypresses before `sent_at` whose edits of `keys` are now
+        committed."""
+        now = time.perf_counter()
+        for key in keys:
+            pending = self._pending.get(key)
+            if not pending:
+                continue
+            keep = []
+            for pressed_at, editor, step in pending:
+                if pressed_at <= sent_at:
+                    histogram = self._histograms.get((editor, step))
+                    if histogram is None:
+                        histogram = self._histograms[(editor, step)] = (
+                            LatencyHistogram()
+                        )
+                    histogram.add((now - pressed_at) * 1000)
+                else:
+                    keep.append((pressed_at, editor, step))
+            if keep:
+                self._pending[key] = keep
+            else:
+                del self._pending[key]
+
+    def reset(self):
+        self._pending = {}
+        self._histograms = {}
+
+    def report(self) -> Dict[str, Any]:
+        """Return the latency distributions per editor and step, per editor, per
+        step and in all."""
+        by_editor: Dict[str, LatencyHistogram] = {}
+        by_step: Dict[str, LatencyHistogram] = {}
+        total = LatencyHistogram(None)
+        for (editor, step), histogram in self._histograms.items():
+            by_editor.setdefault(editor, LatencyHistogram(None)).merge(histogram)
+            by_step.setdefault(step, LatencyHistogram(None)).merge(histogram)
+            total.merge(histogram)
+        return {
+            "total": total.summary() if total.samples else None,
+            "by_editor_and_step": [
+                {"editor": editor, "step": step, **histogram.summary()}
+                for (editor, step), histogram in sorted(self._histograms.items())
+            ],
+            "by_editor": {name: h.summary() for name, h in sorted(by_editor.items())},
+            "by_step": {name: h.summary() for name, h in sorted(by_step.items())},
+        }
+
+    def dump(self, path: str):
+        """Write the report to `path` as JSON."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+
+
+class SessionRecorder:
+    """Writes the keypresses of a session as JSON lines, for replay_session.
+
+    The file is left open; its owner closes it once the session is over.
+    """
+
+    def __init__(self, file: TextIO):
+        self._file = file
+        self._start: Optional[float] = None
+
+    def record(self, editor: str, step: int, key: int, modifiers: int, text: str):
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+        event = {
+            "time": round(now - self._start, 4),
+            "editor": editor,
+            "step": step,
+            "key": key,
+            "modifiers": modifiers,
+            "text": text,
+        }
+        self._file.write(json.dumps(event) + "\n")
@@ -1,32 +1,48 @@
+import contextlib
+import functools
+import os
 import pathlib
-import random
+import sqlite3
+from typing import Iterable, List, Optional, Set
 
-import appdirs
-from PyQt5.QtCore import QModelIndex, Qt
+from PyQt5.QtCore import QEvent, QModelIndex, Qt
 from PyQt5.QtCore import pyqtSlot as slot
-from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import (
     QCompleter,
+    QFileDialog,
     QGridLayout,
-    QListWidgetItem,
+    QHeaderView,
     QMainWindow,
     QMessageBox,
+    QProgressDialog,
     QTabBar,
     QTableView,
 )
 
+from franklin_writing_exercise import exercise_io
 from franklin_writing_exercise.exercise_model import ExerciseColumns, ExerciseModel
+from franklin_writing_exercise.exercise_store import (
+    ExerciseStore,
+    default_database_path,
+)
+from franklin_writing_exercise.jumble_model import JumbleModel
+from franklin_writing_exercise.latency_probe import (
+    RECORD_SESSION_ENV,
+    LatencyProbe,
+    SessionRecorder,
+)
+from franklin_writing_exercise.sql_stats_dialog import SqlStatsDialog
+from franklin_writing_exercise.sql_trace import TRACER
+from franklin_writing_exercise.text_edit import TextEdit
 
 from . import ui_main_window
 
 
 class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
-    def __init__(self):
+    def __init__(self, data_path: Optional[pathlib.Path] = None):
         super().__init__()
-        data_dir = pathlib.Path(appdirs.user_data_dir("franklin_writing_exercise"))
-        data_dir.mkdir(parents=True, exist_ok=True)
-        data_path = data_dir / "exercises.db"
-        self._model = ExerciseModel(str(data_path), parent=self)
+        self._data_path = data_path or default_database_path()
+        self._model = ExerciseModel(str(self._data_path), parent=self)
 
         self._author_completer = QCompleter(
             ExerciseModel.UniqueColumnModel(self._model, ExerciseColumns.Author), self
@@ -35,6 +51,26 @@ class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
             ExerciseModel.UniqueColumnModel(self._model, ExerciseColumns.Source), self
         )
 
+        # Jumbled notes, and the notes in order once the answer is shown
+        self._jumble_model = JumbleModel(self)
+        self._answer_model = JumbleModel(self)
+        # Non-empty lines of the notes, split again only after the notes change
+        self._note_lines: Optional[List[str]] = None
+        # Created when first opened from the Debug menu
+        self._sql_stats_dialog: Optional[SqlStatsDialog] = None
+        # Time from keypresses in the text editors until their edits are committed
+        self._latency_probe = LatencyProbe()
+        self._model.edits_written.connect(self._latency_probe.persisted)
+        # Files kept open while the window is, closed with it
+        self._files = contextlib.ExitStack()
+        self._session_recorder: Optional[SessionRecorder] = None
+        if os.environ.get(RECORD_SESSION_ENV):
+            self._session_recorder = SessionRecorder(
+                self._files.enter_context(
+                    open(os.environ[RECORD_SESSION_ENV], "w", encoding="utf-8")
+                )
+            )
+
         self._step_handlers = (
             self._step_take_notes,
             self._step_rewrite,
@@ -44,7 +80,11 @@ class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
             self._step_jumble,
         )
 
-        self.setupUi(self)
+        try:
+            self.setupUi(self)
+        except BaseException:
+            self._files.close()
+            raise
 
     def setupUi(self, _):
         super().setupUi(self)
@@ -59,6 +99,29 @@ class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
             (ExerciseColumns.Poetry, self.edit_poetry),
             (ExerciseColumns.Prose, self.edit_prose),
         )
+        if self._session_recorder is not None:
+            for _, widget in self._editors:
+                widget.installEventFilter(self)
+        for column, widget in self._editors:
+            if isinstance(widget, TextEdit):
+                widget.text_replaced.connect(
+                    functools.partial(self._on_text_replaced, column)
+                )
+        # Columns shown by each box, loaded into their editors when it is shown
+        self._box_columns = {
+            self.box_meta: (ExerciseColumns.Author, ExerciseColumns.Source),
+            self.box_original: (ExerciseColumns.Original,),
+            self.box_notes: (ExerciseColumns.Notes,),
+            self.box_rewrite: (ExerciseColumns.Rewrite,),
+            self.box_corrections: (ExerciseColumns.Correction,),
+            self.box_poetry: (ExerciseColumns.Poetry,),
+            self.box_prose: (ExerciseColumns.Prose,),
+            # The jumble is made of the notes
+            self.box_jumble: (ExerciseColumns.Notes,),
+        }
+        # Row shown in the editors, and its columns not loaded into them yet
+        self._editors_row = -1
+        self._unloaded_columns: Set[ExerciseColumns] = set()
 
         self.tabbar = QTabBar()
         self.tabbar.addTab("1. Take Notes")
@@ -74,6 +137,11 @@ class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
         self.actionExit.triggered.connect(self.close)
         self.actionRemove.triggered.connect(self._on_action_remove)
         self.actionNew.triggered.connect(self._on_action_new)
+        self.actionImport.triggered.connect(self._on_action_import)
+        self.actionImportFolder.triggered.connect(self._on_action_import_folder)
+        self.actionExport.triggered.connect(self._on_action_export)
+        self.actionSqlStatistics.triggered.connect(self._on_action_sql_statistics)
+        self.actionSaveEditLatency.triggered.connect(self._on_action_save_edit_latency)
 
         self.edit_author.editingFinished.connect(self._on_edit_author_edited)
         self.edit_source.editingFinished.connect(self._on_edit_source_edited)
@@ -84,13 +152,20 @@ class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
         self.edit_prose.textChanged.connect(self._on_edit_prose_edited)
         self.edit_rewrite.textChanged.connect(self._on_edit_rewrite_edited)
 
+        self.edit_search.textChanged.connect(self._on_edit_search_edited)
+        self.edit_filter.textChanged.connect(self._on_edit_filter_edited)
+        self._model.write_failed.connect(self._on_model_write_failed)
+        self._model.storage_failed.connect(self._on_model_storage_failed)
+
         self.table_view.setSelectionBehavior(QTableView.SelectRows)
         self.table_view.clicked.connect(self._on_table_view_clicked)
 
         self.btn_jumble.clicked.connect(self._on_jumble_clicked)
         self.btn_answer.clicked.connect(self._on_answer_clicked)
-        self.list_widget_jumble.setSpacing(8)
-        self.list_widget_answer.setSpacing(8)
+        self.list_view_jumble.setModel(self._jumble_model)
+        self.list_view_answer.setModel(self._answer_model)
+        self.list_view_jumble.setSpacing(8)
+        self.list_view_answer.setSpacing(8)
 
         self._msgbox = QMessageBox(
             QMessageBox.Question,
@@ -110,26 +185,66 @@ class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
         for column in (col for col in ExerciseColumns if col not in displayed_columns):
             self.table_view.setColumnHidden(column.value, True)
 
-        self.table_view.horizontalHeader().setStretchLastSection(True)
+        header = self.table_view.horizontalHeader()
+        header.setSectionResizeMode(ExerciseColumns.Original.value, QHeaderView.Stretch)
+        # Start in table order; the model sorts with SQL when a header is clicked
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        self.table_view.setSortingEnabled(True)
+        header.sortIndicatorChanged.connect(self._on_sort_indicator_changed)
 
         if self._model.rowCount() == 0:
             self._on_action_new()
-        self.table_view.clicked.emit(self._model.index(0, 0))
+        self._select_first_row()
         self.table_view.resizeColumnToContents(ExerciseColumns.Author.value)
         self.table_view.resizeColumnToContents(ExerciseColumns.Source.value)
+        self.table_view.resizeColumnToContents(ExerciseModel.MODIFIED_COLUMN)
 
         self._author_completer.setCompletionMode(QCompleter.PopupCompletion)
         self._author_completer.setCaseSensitivity(Qt.CaseInsensitive)
         self._author_completer.setCompletionRole(Qt.DisplayRole)
+        self._author_completer.setModelSorting(QCompleter.CaseInsensitivelySortedModel)
         self._source_completer.setCompletionMode(QCompleter.PopupCompletion)
         self._source_completer.setCompletionRole(Qt.DisplayRole)
         self._source_completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self._source_completer.setModelSorting(QCompleter.CaseInsensitivelySortedModel)
 
         self.edit_author.setCompleter(self._author_completer)
         self.edit_source.setCompleter(self._source_completer)
 
+    def changeEvent(self, event):
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            self._reload_if_changed()
+        elif event.type() == QEvent.FontChange:
+            self._model.clear_size_hints()
+        super().changeEvent(event)
+
+    def closeEvent(self, event):
+        try:
+            self._model.close()
+        finally:
+            self._session_recorder = None
+            self._files.close()
+        super().closeEvent(event)
+
+    # Override
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() == QEvent.KeyPress and self._session_recorder is not None:
+            self._session_recorder.record(
+                watched.objectName(),
+                self.tabbar.currentIndex(),
+                event.key(),
+                int(event.modifiers()),
+                event.text(),
+            )
+        return super().eventFilter(watched, event)
+
+    @property
+    def latency_probe(self) -> LatencyProbe:
+        return self._latency_probe
+
     @slot(int)
     def _on_tabbar_clicked(self, index: int):
+        self._model.flush()
         if 0 <= index < 6:
             self._step_handlers[index]()
         else:
@@ -137,10 +252,11 @@ class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
 
     @slot()
     def _on_action_remove(self):
-        selected = self.table_view.currentIndex()
-        self._model.removeRow(selected.row())
+        selected = self._editors_row
+        if not self._model.removeRow(selected):
+            return
 
-        current_index = self._model.index(max(0, selected.row() - 1), 0)
+        current_index = self._model.index(max(0, selected - 1), 0)
         self.table_view.clicked.emit(current_index)
         self.table_view.setCurrentIndex(current_index)
 
@@ -154,95 +270,236 @@ class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
         self.table_view.clicked.emit(current_index)
         self.table_view.setCurrentIndex(current_index)
 
+    @slot()
+    def _on_action_import(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Import Exercises",
+            "",
+            "Exercises (*.jsonl *.csv);;JSON Lines (*.jsonl);;CSV (*.csv)",
+        )
+        if path:
+            self._import(pathlib.Path(path))
+
+    @slot()
+    def _on_action_import_folder(self):
+        path = QFileDialog.getExistingDirectory(self, "Import Text Files")
+        if path:
+            self._import(pathlib.Path(path))
+
+    @slot()
+    def _on_action_export(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Export Exercises",
+            "",
+            "JSON Lines (*.jsonl);;CSV (*.csv);;Markdown (*.md)",
+        )
+        if not path:
+            return
+        self._model.flush(wait=True)
+        try:
+            with contextlib.closing(ExerciseStore(str(self._data_path))) as store:
+                # Exports the search results when a search is active
+                exercise_io.export_records(
+                    store.connection, pathlib.Path(path), search=self.edit_search.text()
+                )
+        except (OSError, ValueError, sqlite3.Error) as e:
+            QMessageBox.warning(self, "Export Failed", str(e))
+
+    @slot()
+    def _on_action_sql_statistics(self):
+        if self._sql_stats_dialog is None:
+            self._sql_stats_dialog = SqlStatsDialog(TRACER, self)
+        self._sql_stats_dialog.show()
+        self._sql_stats_dialog.raise_()
+        self._sql_stats_dialog.activateWindow()
+
+    @slot()
+    def _on_action_save_edit_latency(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Edit Latency", "edit-latency.json", "JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            self._latency_probe.dump(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Save Failed", str(e))
+
     @slot()
     def _on_edit_author_edited(self):
-        selected = self.table_view.currentIndex().row()
-        self._model.set_data(selected, ExerciseColumns.Author, self.edit_author.text())
+        if self._editors_row < 0:
+            return
+        self._model.set_data(
+            self._editors_row, ExerciseColumns.Author, self.edit_author.text()
+        )
         self.table_view.resizeColumnToContents(ExerciseColumns.Author.value)
 
     @slot()
     def _on_edit_source_edited(self):
-        selected = self.table_view.currentIndex().row()
-        self._model.set_data(selected, ExerciseColumns.Source, self.edit_source.text())
+        if self._editors_row < 0:
+            return
+        self._model.set_data(
+            self._editors_row, ExerciseColumns.Source, self.edit_source.text()
+        )
         self.table_view.resizeColumnToContents(ExerciseColumns.Source.value)
 
     @slot()
     def _on_edit_corrections_edited(self):
-        selected = self.table_view.currentIndex().row()
-        value = self.edit_corrections.toPlainText()
-        self._model.set_data(selected, ExerciseColumns.Correction, value)
+        self._text_edited(ExerciseColumns.Correction, self.edit_corrections)
 
     @slot()
     def _on_edit_notes_edited(self):
-        selected = self.table_view.currentIndex().row()
-        value = self.edit_notes.toPlainText()
-        self._model.set_data(selected, ExerciseColumns.Notes, value)
+        self._note_lines = None
+        self._text_edited(ExerciseColumns.Notes, self.edit_notes)
 
     @slot()
     def _on_edit_original_edited(self):
-        selected = self.table_view.currentIndex().row()
-        value = self.edit_original.toPlainText()
-        self._model.set_data(selected, ExerciseColumns.Original, value)
+        self._text_edited(ExerciseColumns.Original, self.edit_original)
 
     @slot()
     def _on_edit_poetry_edited(self):
-        selected = self.table_view.currentIndex().row()
-        value = self.edit_poetry.toPlainText()
-        self._model.set_data(selected, ExerciseColumns.Poetry, value)
+        self._text_edited(ExerciseColumns.Poetry, self.edit_poetry)
 
     @slot()
     def _on_edit_prose_edited(self):
-        selected = self.table_view.currentIndex().row()
-        value = self.edit_prose.toPlainText()
-        self._model.set_data(selected, ExerciseColumns.Prose, value)
+        self._text_edited(ExerciseColumns.Prose, self.edit_prose)
 
     @slot()
     def _on_edit_rewrite_edited(self):
-        selected = self.table_view.currentIndex().row()
-        value = self.edit_rewrite.toPlainText()
-        self._model.set_data(selected, ExerciseColumns.Rewrite, value)
+        self._text_edited(ExerciseColumns.Rewrite, self.edit_rewrite)
+
+    @slot(str)
+    def _on_edit_search_edited(self, text: str):
+        self._model.set_search(text)
+        self._select_first_row()
+
+    @slot(str)
+    def _on_edit_filter_edited(self, text: str):
+        self._model.set_filter(text)
+        self._select_first_row()
+
+    @slot(int, Qt.SortOrder)
+    def _on_sort_indicator_changed(self, *_):
+        # The model was reset by the view's sortByColumn, which runs first
+        self._select_first_row()
+
+    @slot(str)
+    def _on_model_write_failed(self, message: str):
+        self.statusbar.showMessage(f"Could not save changes, will retry: {message}")
+
+    @slot(str)
+    def _on_model_storage_failed(self, message: str):
+        self.statusbar.showMessage(f"Storage error: {message}")
 
     @slot(QModelIndex)
     def _on_table_view_clicked(self, current: QModelIndex):
+        self._model.flush()
         if not current.isValid():
+            self._editors_row = -1
+            self._unloaded_columns.clear()
+            self._note_lines = None
             for (_, w) in self._editors:
                 w.setText("")
                 w.parent().setEnabled(False)
         else:
-            data = self._model.get_row(current.row())
-            for column, widget in self._editors:
-                widget.setText(data[column.value])
+            # Editors are filled as their boxes are shown, starting with this step's
+            self._editors_row = current.row()
+            self._unloaded_columns = set(ExerciseColumns)
+            for _, widget in self._editors:
+                widget.parent().setEnabled(True)
             self._step_take_notes()
 
     @slot()
     def _on_jumble_clicked(self):
-        note_lines = self._get_note_as_lines()
-        random.shuffle(note_lines)
-        self.list_widget_jumble.clear()
-        for line in note_lines:
-            item = QListWidgetItem(line)
-            self.list_widget_jumble.addItem(item)
-        self.list_widget_answer.clear()
+        self._jumble_model.set_lines(self._get_note_as_lines())
+        self._jumble_model.shuffle()
+        self._answer_model.set_lines(())
 
     @slot()
     def _on_answer_clicked(self):
         note_lines = self._get_note_as_lines()
-        self.list_widget_answer.clear()
-        for line in note_lines:
-            item = QListWidgetItem(line)
-            item.setBackground(self._random_color(line))
-            self.list_widget_answer.addItem(item)
+        if self._jumble_model.rowCount() != len(note_lines):
+            # The notes changed since they were jumbled
+            self._on_jumble_clicked()
+        self._answer_model.set_lines(note_lines)
+        self._answer_model.set_colored(True)
+        self._jumble_model.set_colored(True)
+        self.list_view_jumble.setCurrentIndex(QModelIndex())
+
+    def _import(self, path: pathlib.Path):
+        progress = QProgressDialog(f"Importing {path.name}...", "", 0, 0, self)
+        progress.setCancelButton(None)
+        # The import runs on the storage thread; the rows are not to be edited until
+        # it is done and they are reloaded
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+
+        def report(count: int):
+            progress.setLabelText(f"Importing {path.name}: {count} exercises")
+
+        def finished(_, message: str):
+            self._model.import_progress.disconnect(report)
+            self._model.import_finished.disconnect(finished)
+            progress.close()
+            progress.deleteLater()
+            if message:
+                QMessageBox.warning(self, "Import Failed", message)
+            # Rows imported before a failure are kept, and shown too
+            self._reload_if_changed()
+
+        self._model.import_progress.connect(report)
+        self._model.import_finished.connect(finished)
+        self._model.import_file(str(path))
+
+    def _reload_if_changed(self):
+        selected = self._editors_row
+        if self._model.reload_if_changed():
+            if self._model.rowCount() == 0:
+                self._on_action_new()
+                return
+            current_index = self._model.index(
+                min(max(0, selected), self._model.rowCount() - 1), 0
+            )
+            self.table_view.clicked.emit(current_index)
+            self.table_view.setCurrentIndex(current_index)
+
+    def _select_first_row(self):
+        current_index = self._model.index(0, 0)
+        self.table_view.clicked.emit(current_index)
+        self.table_view.setCurrentIndex(current_index)
 
-        for i in range(len(note_lines)):
-            item = self.list_widget_jumble.item(i)
-            item.setBackground(self._random_color(item.text()))
-        self.list_widget_jumble.setCurrentRow(-1)
+    def _on_text_replaced(
+        self, column: ExerciseColumns, position: int, removed: int, text: str
+    ):
+        if self._editors_row >= 0:
+            self._model.journal_edit(self._editors_row, column, position, removed, text)
+
+    def _text_edited(self, column: ExerciseColumns, editor: TextEdit):
+        # The text is only copied out of the editor when edits are flushed
+        if self._editors_row < 0:
+            return
+        self._model.defer_data(self._editors_row, column, editor.take_text)
+        self._probe_keypress(self._editors_row, column, editor)
+
+    def _probe_keypress(self, row: int, column: ExerciseColumns, editor: TextEdit):
+        """Measure the latency of an edit if typed, until it is committed."""
+        if editor.key_press_time is not None:
+            step = self._step_handlers[self.tabbar.currentIndex()].__name__
+            self._latency_probe.edited(
+                (self._model.rowid(row), column),
+                editor.key_press_time,
+                editor.objectName(),
+                step[len("_step_") :],
+            )
 
     def _get_note_as_lines(self):
-        note_lines = self.edit_notes.toPlainText().splitlines(keepends=False)
-        note_lines = (l.strip() for l in note_lines)
-        note_lines = [l for l in note_lines if l]
-        return note_lines
+        if self._note_lines is None:
+            note_lines = self.edit_notes.toPlainText().splitlines(keepends=False)
+            note_lines = (l.strip() for l in note_lines)
+            self._note_lines = [l for l in note_lines if l]
+        return self._note_lines
 
     def _step_take_notes(self):
         self._toggle_boxes((self.box_meta, self.box_original, self.box_notes))
@@ -287,6 +544,9 @@ class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
         self.tabbar.setCurrentIndex(5)
 
     def _toggle_boxes(self, enabled_boxes):
+        self._load_columns(
+            column for box in enabled_boxes for column in self._box_columns[box]
+        )
         for widget in (
             self.box_meta,
             self.box_corrections,
@@ -302,13 +562,18 @@ class MainWindow(QMainWindow, ui_main_window.Ui_MainWindow):
             else:
                 widget.setVisible(False)
 
+    def _load_columns(self, columns: Iterable[ExerciseColumns]):
+        """Load the selected exercise's `columns` into their editors, if not yet."""
+        columns = [col for col in columns if col in self._unloaded_columns]
+        if not columns:
+            return
+        editors = dict(self._editors)
+        values = self._model.get_values(self._editors_row, columns)
+        for column, value in zip(columns, values):
+            editors[column].setText(value)
+        self._unloaded_columns.difference_update(columns)
+        if ExerciseColumns.Notes in columns:
+            self._note_lines = None
+
     def _question_should_overwrite_correction(self):
         return (self._msgbox.exec()) == QMessageBox.Yes
-
-    @staticmethod
-    def _random_color(lit):
-        hashed = hash(lit)
-        hue = (hashed & 0xFF) / 0xFF
-        sat = ((hashed >> 8) & 0xFF) / 0xFF * 0.8
-        lit = ((hashed >> 16) & 0xFF) / 0xFF * 0.4 + 0.6
-        return QColor.fromHslF(hue, sat, lit)
@@ -0,0 +1,123 @@
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import pyqtSlot as slot
+from PyQt5.QtWidgets import (
+    QAbstractItemView,
+    QCheckBox,
+    QDialog,
+    QDialogButtonBox,
+    QFileDialog,
+    QHeaderView,
+    QLabel,
+    QMessageBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from franklin_writing_exercise.sql_trace import SqlTracer
+
+
+class SqlStatsDialog(QDialog):
+    """Live statistics of the SQL statements run by the application."""
+
+    # Milliseconds between refreshes while the dialog is shown
+    REFRESH_INTERVAL = 1000
+    COLUMNS = (
+        ("Statement", "sql"),
+        ("Count", "count"),
+        ("Total (ms)", "total_ms"),
+        ("Mean (ms)", "mean_ms"),
+        ("p99 (ms)", "p99_ms"),
+        ("Rows", "rows"),
+    )
+
+    def __init__(self, tracer: SqlTracer, parent=None):
+        super().__init__(parent=parent)
+        self._tracer = tracer
+        self.setWindowTitle("SQL Statistics")
+        self.resize(900, 500)
+
+        self._check_trace = QCheckBox("&Trace statements", self)
+        self._check_trace.setChecked(tracer.enabled)
+        self._check_trace.toggled.connect(self._on_trace_toggled)
+        self._label_commits = QLabel(self)
+        self._table = QTableWidget(0, len(self.COLUMNS), self)
+        self._table.setHorizontalHeaderLabels([title for title, _ in self.COLUMNS])
+        self._table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self._table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self._table.setWordWrap(False)
+        self._table.verticalHeader().hide()
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close, self)
+        buttons.addButton("&Reset", QDialogButtonBox.ResetRole).clicked.connect(
+            self._on_reset_clicked
+        )
+        buttons.addButton("&Save...", QDialogButtonBox.ActionRole).clicked.connect(
+            self._on_save_clicked
+        )
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self._check_trace)
+        layout.addWidget(self._label_commits)
+        layout.addWidget(self._table)
+        layout.addWidget(buttons)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+
+    @slot()
+    def refresh(self):
+        report = self._tracer.report()
+        commits = report["commits"]
+        self._label_commits.setText(
+            f"{commits['count']} commits, {commits['total_ms']:.1f} ms in all, "
+            f"p99 {commits['p99_ms']:.2f} ms"
+        )
+        statements = report["statements"]
+        self._table.setRowCount(len(statements))
+        for row, statement in enumerate(statements):
+            for column, (_, key) in enumerate(self.COLUMNS):
+                value = statement[key]
+                if isinstance(value, float):
+                    item = QTableWidgetItem(f"{value:.3f}")
+                else:
+                    item = QTableWidgetItem(str(value))
+                if column == 0:
+                    item.setToolTip(value)
+                else:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self._table.setItem(row, column, item)
+
+    # Override
+    def showEvent(self, event):
+        self.refresh()
+        self._timer.start()
+        super().showEvent(event)
+
+    # Override
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+
+    @slot(bool)
+    def _on_trace_toggled(self, checked: bool):
+        self._tracer.enabled = checked
+
+    @slot()
+    def _on_reset_clicked(self):
+        self._tracer.reset()
+        self.refresh()
+
+    @slot()
+    def _on_save_clicked(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save SQL Statistics", "sql-statistics.json", "JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            self._tracer.dump(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Save Failed", str(e))
@@ -0,0 +1,251 @@
+import collections
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Deque, Dict, List, Optional
+
+# This module must not import Qt: the storage layer depends on it.
+
+# Environment variable that turns tracing on from startup when set to 1
+SQL_TRACE_ENV = "FRANKLIN_SQL_TRACE"
+# Number of latest run times kept per statement for percentiles
+SAMPLE_SIZE = 1000
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize(sql: str) -> str:
+    """Return `sql` on one line, with lists of placeholders shortened, so that runs
+    of the same statement are counted together."""
+    sql = " ".join(sql.split())
+    return re.sub(r"\?(?:\s*,\s*\?)+", "?, …", sql)
+
+
+class StatementStats:
+    __slots__ = ("count", "total", "rows", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.rows = 0
+        self.samples: Deque[float] = collections.deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, elapsed: float, rows: int):
+        self.count += 1
+        self.total += elapsed
+        self.rows += rows
+        self.samples.append(elapsed)
+
+    def percentile(self, fraction: float) -> float:
+        samples = sorted(self.samples)
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class SqlTracer:
+    """Statistics of the statements and commits run through traced connections.
+
+    Connections and cursors record into the tracer from any thread. Run times
+    include fetching the rows.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._statements: Dict[str, StatementStats] = {}
+        self._commits = StatementStats()
+
+    def reset(self):
+        with self._lock:
+            self._statements = {}
+            self._commits = StatementStats()
+
+    def record(self, sql: str, elapsed: float, rows: int):
+        key = normalize(sql)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = StatementStats()
+            stats.add(elapsed, rows)
+
+    def record_commit(self, elapsed: float):
+        with self._lock:
+            self._commits.add(elapsed, 0)
+
+    def report(self) -> Dict[str, Any]:
+        """Return the statistics so far, statements by decreasing total time.
+
+        Times are in milliseconds.
+        """
+        with self._lock:
+            statements = [
+                {
+                    "sql": sql,
+                    "count": stats.count,
+                    "total_ms": stats.total * 1000,
+                    "mean_ms": stats.total / stats.count * 1000,
+                    "p99_ms": stats.percentile(0.99) * 1000,
+                    "rows": stats.rows,
+                }
+                for sql, stats in self._statements.items()
+            ]
+            commits = {
+                "count": self._commits.count,
+                "total_ms": self._commits.total * 1000,
+                "p99_ms": (
+                    self._commits.percentile(0.99) * 1000 if self._commits.count else 0
+                ),
+            }
+        statements.sort(key=lambda s: s["total_ms"], reverse=True)
+        return {"statements": statements, "commits": commits}
+
+    def dump(self, path: str):
+        """Write the statistics so far to `path` as JSON."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+
+
+# Tracer of all connections opened by ExerciseStore
+TRACER = SqlTracer(enabled=os.environ.get(SQL_TRACE_ENV) == "1")
+
+
+class TracingCursor:
+    """Cursor recording each statement once its rows are fetched, or once it is
+    closed, reused or dropped."""
+
+    def __init__(self, cursor: sqlite3.Cursor, tracer: SqlTracer):
+        self._cursor = cursor
+        self._tracer = tracer
+        self._sql: Optional[str] = None
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def execute(self, sql: str, parameters=()) -> "TracingCursor":
+        return self._run(self._cursor.execute, sql, parameters)
+
+    def executemany(self, sql: str, parameters) -> "TracingCursor":
+        return self._run(self._cursor.executemany, sql, parameters)
+
+    def fetchone(self) -> Optional[tuple]:
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._elapsed += time.perf_counter() - start
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> List[tuple]:
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(self._cursor.arraysize if size is None else size)
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self) -> List[tuple]:
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> tuple:
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+    def __del__(self):
+        self._finish()
+
+    def _run(self, method, sql: str, parameters) -> "TracingCursor":
+        self._finish()
+        start = time.perf_counter()
+        method(sql, parameters)
+        self._elapsed = time.perf_counter() - start
+        self._sql = sql
+        self._rows = 0
+        return self
+
+    def _finish(self):
+        if self._sql is not None:
+            self._tracer.record(self._sql, self._elapsed, self._rows)
+            self._sql = None
+
+
+class TracingConnection:
+    """Wraps a connection to record its statements and commits in `tracer`.
+
+    While the tracer is disabled, calls go straight to the connection.
+    """
+
+    def __init__(self, db: sqlite3.Connection, tracer: SqlTracer = TRACER):
+        self._db = db
+        self._tracer = tracer
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self._db
+
+    def cursor(self):
+        if not self._tracer.enabled:
+            return self._db.cursor()
+        return TracingCursor(self._db.cursor(), self._tracer)
+
+    def execute(self, sql: str, parameters=()):
+        if not self._tracer.enabled:
+            return self._db.execute(sql, parameters)
+        return TracingCursor(self._db.cursor(), self._tracer).execute(sql, parameters)
+
+    def executemany(self, sql: str, parameters):
+        if not self._tracer.enabled:
+            return self._db.executemany(sql, parameters)
+        return TracingCursor(self._db.cursor(), self._tracer).executemany(
+            sql, parameters
+        )
+
+    def commit(self):
+        if not (self._tracer.enabled and self._db.in_transaction):
+            return self._db.commit()
+        start = time.perf_counter()
+        self._db.commit()
+        self._tracer.record_commit(time.perf_counter() - start)
+        return None
+
+    def backup(self, target, **kwargs):
+        if isinstance(target, TracingConnection):
+            target = target.connection
+        self._db.backup(target, **kwargs)
+
+    def __enter__(self) -> "TracingConnection":
+        self._db.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None or not (
+            self._tracer.enabled and self._db.in_transaction
+        ):
+            return self._db.__exit__(exc_type, exc_value, traceback)
+        start = time.perf_counter()
+        result = self._db.__exit__(exc_type, exc_value, traceback)
+        self._tracer.record_commit(time.perf_counter() - start)
+        return result
+
+    def __getattr__(self, name: str):
+        return getattr(self._db, name)
@@ -0,0 +1,142 @@
+import csv
+import pathlib
+import sqlite3
+from typing import List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QThread
+from PyQt5.QtCore import pyqtSignal as signal
+from PyQt5.QtCore import pyqtSlot as slot
+
+from franklin_writing_exercise import exercise_io
+from franklin_writing_exercise.edit_journal import EditJournal
+from franklin_writing_exercise.exercise_store import ExerciseColumns, ExerciseStore
+
+Edit = Tuple[Tuple[int, ExerciseColumns], str]
+
+
+class StorageWorker(QObject):
+    """Runs reads and writes on a connection of its own, in a storage thread.
+
+    Requests arrive as queued slot calls and results are returned through signals,
+    so the GUI thread never waits on the disk.
+    """
+
+    # Batch id of a write request that has been committed
+    written = signal(int)
+    # Batch id of a write request that failed, and the error message
+    write_failed = signal(int, str)
+    # List of (rowid, summary) read for a read request
+    rows_read = signal(list)
+    # Query of a snippet request, and the list of (rowid, snippet) read for it; the
+    # snippet is empty for rows that no longer match
+    snippets_read = signal(str, list)
+    # Running total of the records inserted by an import request
+    imported = signal(int)
+    # Number of records inserted by an import request, and the error message if it
+    # failed, or an empty one
+    import_finished = signal(int, str)
+    # Error message of a request other than a write or import that failed
+    failed = signal(str)
+
+    def __init__(self, filename: str, journal: Optional[EditJournal] = None):
+        super().__init__()
+        self._filename = filename
+        # Synced and compacted here, off the GUI thread
+        self._journal = journal
+        self._store: Optional[ExerciseStore] = None
+        self._thread = QThread()
+        self._thread.setObjectName("StorageWorker")
+        self.moveToThread(self._thread)
+        self._thread.started.connect(self._open)
+        self._thread.start()
+
+    # Slots catch the errors of their requests: an exception escaping a slot
+    # aborts the application.
+
+    @slot()
+    def _open(self):
+        try:
+            self._open_store()
+        except sqlite3.Error as e:
+            self.failed.emit(str(e))
+
+    def _open_store(self) -> ExerciseStore:
+        """Return the store, opening it again if opening it failed before."""
+        if self._store is None:
+            self._store = ExerciseStore(self._filename)
+        return self._store
+
+    @slot(int, list, int)
+    def write(self, batch: int, edits: List[Edit], journal_seq: int):
+        """Write edits that include the edit journal up to `journal_seq`."""
+        try:
+            self._open_store().update(edits, journal_seq)
+        except sqlite3.Error as e:
+            self.write_failed.emit(batch, str(e))
+            return
+        self.written.emit(batch)
+        if self._journal is not None and journal_seq:
+            try:
+                self._journal.compact(journal_seq)
+            except OSError as e:
+                self.failed.emit(str(e))
+
+    @slot()
+    def sync_journal(self):
+        if self._journal is not None:
+            try:
+                self._journal.sync()
+            except OSError as e:
+                self.failed.emit(str(e))
+
+    @slot(list)
+    def read(self, rowids: List[int]):
+        try:
+            self.rows_read.emit(self._open_store().get_summaries(rowids))
+        except sqlite3.Error as e:
+            self.failed.emit(str(e))
+
+    @slot(str, list)
+    def read_snippets(self, query: str, rowids: List[int]):
+        try:
+            found = self._open_store().snippets(query, rowids)
+        except sqlite3.Error as e:
+            self.failed.emit(str(e))
+            return
+        self.snippets_read.emit(
+            query, [(rowid, found.get(rowid, "")) for rowid in rowids]
+        )
+
+    @slot(str)
+    def import_file(self, path: str):
+        """Insert the records of a file or directory, see exercise_io.read_records."""
+        total = 0
+
+        def report(count: int):
+            nonlocal total
+            total = count
+            self.imported.emit(count)
+
+        try:
+            exercise_io.import_records(
+                self._open_store().connection,
+                exercise_io.read_records(pathlib.Path(path)),
+                report,
+            )
+        except (OSError, ValueError, csv.Error, sqlite3.Error) as e:
+            self.import_finished.emit(total, str(e))
+            return
+        self.import_finished.emit(total, "")
+
+    @slot()
+    def sync(self):
+        """Do nothing; a blocking call returns once earlier requests are done."""
+
+    @slot()
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+        self._thread.quit()
+
+    def wait(self):
+        self._thread.wait()
@@ -1,30 +1,137 @@
-from PyQt5.QtGui import QTextBlockFormat, QTextCursor
+import time
+from typing import Optional
+
+from PyQt5.QtCore import pyqtSignal as signal
+from PyQt5.QtCore import pyqtSlot as slot
+from PyQt5.QtGui import QTextBlockFormat, QTextCursor, QTextDocument
 
 from PyQt5.QtWidgets import QTextEdit
 
+# Characters QTextDocument.toPlainText() replaces, and with what
+_PLAIN_TEXT = str.maketrans(
+    {"\u2029": "\n", "\u2028": "\n", "\ufdd0": "\n", "\ufdd1": "\n", "\u00a0": " "}
+)
+
 
 class TextEdit(QTextEdit):
+    # Emitted when the text changes other than by setText, with the position and the
+    # number of characters replaced, and the text replacing them. Positions count
+    # UTF-16 code units of toPlainText().
+    text_replaced = signal(int, int, str)
+
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self._paragraph_format = QTextBlockFormat()
         self._paragraph_format.setBottomMargin(16)
+        self._formatting = False
+        # time.perf_counter() when the key being handled was pressed, so that
+        # textChanged handlers can tell typing apart and measure from the keypress
+        self.key_press_time: Optional[float] = None
+        # Number of changes made to the text, and the number it was last loaded or
+        # taken at; the text is only copied out when they differ
+        self.revision = 0
+        self._clean_revision = 0
+        self._set_paragraph_format(self.document())
+        self.document().contentsChange.connect(self._on_contents_change)
 
     def setText(self, value: str):
+        """Load `value` without emitting textChanged, as a clean text."""
         old_state = self.blockSignals(True)
         self.setPlainText(value)
         self.blockSignals(old_state)
+        self._clean_revision = self.revision
+
+    def is_dirty(self) -> bool:
+        return self.revision != self._clean_revision
+
+    def take_text(self) -> Optional[str]:
+        """Return the text if changed since it was last loaded or taken, and mark it
+        clean; otherwise return None."""
+        if not self.is_dirty():
+            return None
+        self._clean_revision = self.revision
+        return self.toPlainText()
 
     def setPlainText(self, text: str):
-        super().setPlainText(text)
-        self._set_paragraph_format()
-
-    def _set_paragraph_format(self):
-        cursor = QTextCursor(self.document())
-
-        while True:
-            cursor.beginEditBlock()
-            cursor.setBlockFormat(self._paragraph_format)
-            cursor.endEditBlock()
-            has_next = cursor.movePosition(QTextCursor.NextBlock)
-            if not has_next:
-                break
+        # The text is formatted in a new document, before any layout is attached to
+        # it, so the widget lays the document out only once, already formatted.
+        old_document = self.document()
+        document = QTextDocument(self)
+        document.setDefaultFont(old_document.defaultFont())
+        document.setDefaultTextOption(old_document.defaultTextOption())
+        document.setDocumentMargin(old_document.documentMargin())
+        document.setPlainText(text)
+        document.setUndoRedoEnabled(False)
+        self._set_paragraph_format(document)
+        document.setUndoRedoEnabled(True)
+
+        # The widget deletes its initial document itself, but not those set here
+        owned = old_document.parent() is self
+        old_length = old_document.characterCount() - 1
+        self.setDocument(document)
+        # Connected only now: attaching the layout reports the whole text as added
+        document.contentsChange.connect(self._on_contents_change)
+        self.revision += 1
+        if not self.signalsBlocked():
+            self.text_replaced.emit(0, old_length, document.toPlainText())
+        if owned:
+            old_document.deleteLater()
+
+    # Override
+    def keyPressEvent(self, event):
+        self.key_press_time = time.perf_counter()
+        try:
+            super().keyPressEvent(event)
+        finally:
+            self.key_press_time = None
+
+    @slot(int, int, int)
+    def _on_contents_change(self, position: int, chars_removed: int, chars_added: int):
+        # Formats only the blocks touched by an edit, so that new paragraphs get the
+        # paragraph format without a pass over the whole document.
+        if self._formatting:
+            return
+        self.revision += 1
+        document = self.document()
+        self._emit_text_replaced(document, position, chars_removed, chars_added)
+        block = document.findBlock(position)
+        last = document.findBlock(position + chars_added)
+        if not last.isValid():
+            last = document.lastBlock()
+
+        margin = self._paragraph_format.bottomMargin()
+        while block.isValid() and block.blockFormat().bottomMargin() == margin:
+            if block == last:
+                return
+            block = block.next()
+        if not block.isValid():
+            return
+
+        cursor = QTextCursor(document)
+        cursor.setPosition(block.position())
+        cursor.setPosition(last.position(), QTextCursor.KeepAnchor)
+        self._formatting = True
+        cursor.joinPreviousEditBlock()
+        cursor.mergeBlockFormat(self._paragraph_format)
+        cursor.endEditBlock()
+        self._formatting = False
+
+    def _emit_text_replaced(
+        self, document: QTextDocument, position: int, removed: int, added: int
+    ):
+        if self.signalsBlocked():
+            return
+        # Changes may be reported up to the end of the final block, one past the
+        # last character
+        end = min(position + added, document.characterCount() - 1)
+        cursor = QTextCursor(document)
+        cursor.setPosition(position)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        self.text_replaced.emit(
+            position, removed, cursor.selectedText().translate(_PLAIN_TEXT)
+        )
+
+    def _set_paragraph_format(self, document: QTextDocument):
+        cursor = QTextCursor(document)
+        cursor.select(QTextCursor.Document)
+        cursor.setBlockFormat(self._paragraph_format)
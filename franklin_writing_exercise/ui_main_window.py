@@ -22,9 +22,23 @@ class Ui_MainWindow(object):
         self.splitter = QtWidgets.QSplitter(self.centralwidget)
         self.splitter.setOrientation(QtCore.Qt.Horizontal)
         self.splitter.setObjectName("splitter")
-        self.table_view = QtWidgets.QTableView(self.splitter)
+        self.widget_table = QtWidgets.QWidget(self.splitter)
+        self.widget_table.setObjectName("widget_table")
+        self.verticalLayout_table = QtWidgets.QVBoxLayout(self.widget_table)
+        self.verticalLayout_table.setContentsMargins(0, 0, 0, 0)
+        self.verticalLayout_table.setObjectName("verticalLayout_table")
+        self.edit_search = QtWidgets.QLineEdit(self.widget_table)
+        self.edit_search.setClearButtonEnabled(True)
+        self.edit_search.setObjectName("edit_search")
+        self.verticalLayout_table.addWidget(self.edit_search)
+        self.edit_filter = QtWidgets.QLineEdit(self.widget_table)
+        self.edit_filter.setClearButtonEnabled(True)
+        self.edit_filter.setObjectName("edit_filter")
+        self.verticalLayout_table.addWidget(self.edit_filter)
+        self.table_view = QtWidgets.QTableView(self.widget_table)
         self.table_view.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
         self.table_view.setObjectName("table_view")
+        self.verticalLayout_table.addWidget(self.table_view)
         self.widget = QtWidgets.QWidget(self.splitter)
         self.widget.setObjectName("widget")
         self.verticalLayout_2 = QtWidgets.QVBoxLayout(self.widget)
@@ -149,18 +163,18 @@ class Ui_MainWindow(object):
         self.horizontalLayout_2 = QtWidgets.QHBoxLayout(self.widget_3)
         self.horizontalLayout_2.setContentsMargins(0, 0, 0, 0)
         self.horizontalLayout_2.setObjectName("horizontalLayout_2")
-        self.list_widget_jumble = QtWidgets.QListWidget(self.widget_3)
-        self.list_widget_jumble.setDragEnabled(True)
-        self.list_widget_jumble.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
-        self.list_widget_jumble.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
-        self.list_widget_jumble.setWordWrap(True)
-        self.list_widget_jumble.setObjectName("list_widget_jumble")
-        self.horizontalLayout_2.addWidget(self.list_widget_jumble)
-        self.list_widget_answer = QtWidgets.QListWidget(self.widget_3)
-        self.list_widget_answer.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
-        self.list_widget_answer.setWordWrap(True)
-        self.list_widget_answer.setObjectName("list_widget_answer")
-        self.horizontalLayout_2.addWidget(self.list_widget_answer)
+        self.list_view_jumble = QtWidgets.QListView(self.widget_3)
+        self.list_view_jumble.setDragEnabled(True)
+        self.list_view_jumble.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
+        self.list_view_jumble.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.list_view_jumble.setWordWrap(True)
+        self.list_view_jumble.setObjectName("list_view_jumble")
+        self.horizontalLayout_2.addWidget(self.list_view_jumble)
+        self.list_view_answer = QtWidgets.QListView(self.widget_3)
+        self.list_view_answer.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.list_view_answer.setWordWrap(True)
+        self.list_view_answer.setObjectName("list_view_answer")
+        self.horizontalLayout_2.addWidget(self.list_view_answer)
         self.verticalLayout.addWidget(self.widget_3)
         self.btn_jumble = QtWidgets.QPushButton(self.box_jumble)
         self.btn_jumble.setObjectName("btn_jumble")
@@ -178,6 +192,8 @@ class Ui_MainWindow(object):
         self.menubar.setObjectName("menubar")
         self.menuExerpts = QtWidgets.QMenu(self.menubar)
         self.menuExerpts.setObjectName("menuExerpts")
+        self.menuDebug = QtWidgets.QMenu(self.menubar)
+        self.menuDebug.setObjectName("menuDebug")
         MainWindow.setMenuBar(self.menubar)
         self.statusbar = QtWidgets.QStatusBar(MainWindow)
         self.statusbar.setObjectName("statusbar")
@@ -186,12 +202,30 @@ class Ui_MainWindow(object):
         self.actionNew.setObjectName("actionNew")
         self.actionRemove = QtWidgets.QAction(MainWindow)
         self.actionRemove.setObjectName("actionRemove")
+        self.actionImport = QtWidgets.QAction(MainWindow)
+        self.actionImport.setObjectName("actionImport")
+        self.actionImportFolder = QtWidgets.QAction(MainWindow)
+        self.actionImportFolder.setObjectName("actionImportFolder")
+        self.actionExport = QtWidgets.QAction(MainWindow)
+        self.actionExport.setObjectName("actionExport")
         self.actionExit = QtWidgets.QAction(MainWindow)
         self.actionExit.setObjectName("actionExit")
+        self.actionSqlStatistics = QtWidgets.QAction(MainWindow)
+        self.actionSqlStatistics.setObjectName("actionSqlStatistics")
+        self.actionSaveEditLatency = QtWidgets.QAction(MainWindow)
+        self.actionSaveEditLatency.setObjectName("actionSaveEditLatency")
         self.menuExerpts.addAction(self.actionNew)
         self.menuExerpts.addAction(self.actionRemove)
+        self.menuExerpts.addSeparator()
+        self.menuExerpts.addAction(self.actionImport)
+        self.menuExerpts.addAction(self.actionImportFolder)
+        self.menuExerpts.addAction(self.actionExport)
+        self.menuExerpts.addSeparator()
         self.menuExerpts.addAction(self.actionExit)
+        self.menuDebug.addAction(self.actionSqlStatistics)
+        self.menuDebug.addAction(self.actionSaveEditLatency)
         self.menubar.addAction(self.menuExerpts.menuAction())
+        self.menubar.addAction(self.menuDebug.menuAction())
 
         self.retranslateUi(MainWindow)
         QtCore.QMetaObject.connectSlotsByName(MainWindow)
@@ -199,6 +233,8 @@ class Ui_MainWindow(object):
     def retranslateUi(self, MainWindow):
         _translate = QtCore.QCoreApplication.translate
         MainWindow.setWindowTitle(_translate("MainWindow", "MainWindow"))
+        self.edit_search.setPlaceholderText(_translate("MainWindow", "Search exercises"))
+        self.edit_filter.setPlaceholderText(_translate("MainWindow", "Filter by author or source"))
         self.box_meta.setTitle(_translate("MainWindow", "Metadata"))
         self.label.setText(_translate("MainWindow", "Author"))
         self.label_2.setText(_translate("MainWindow", "Source"))
@@ -212,7 +248,13 @@ class Ui_MainWindow(object):
         self.btn_jumble.setText(_translate("MainWindow", "Shuffle!"))
         self.btn_answer.setText(_translate("MainWindow", "Answer!"))
         self.menuExerpts.setTitle(_translate("MainWindow", "Exerpts"))
+        self.menuDebug.setTitle(_translate("MainWindow", "&Debug"))
         self.actionNew.setText(_translate("MainWindow", "&New"))
         self.actionRemove.setText(_translate("MainWindow", "&Remove"))
+        self.actionImport.setText(_translate("MainWindow", "&Import..."))
+        self.actionImportFolder.setText(_translate("MainWindow", "Import &Folder..."))
+        self.actionExport.setText(_translate("MainWindow", "&Export..."))
         self.actionExit.setText(_translate("MainWindow", "E&xit"))
+        self.actionSqlStatistics.setText(_translate("MainWindow", "&SQL Statistics..."))
+        self.actionSaveEditLatency.setText(_translate("MainWindow", "Save &Edit Latency..."))
 from franklin_writing_exercise.text_edit import TextEdit
@@ -0,0 +1,127 @@
+import pytest
+
+from franklin_writing_exercise.edit_journal import (
+    EditJournal,
+    journal_path,
+    read_entries,
+    replay,
+)
+from franklin_writing_exercise.exercise_store import ExerciseColumns, ExerciseStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ExerciseStore(str(tmp_path / "exercises.sqlite3"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return journal_path(str(tmp_path / "exercises.sqlite3"))
+
+
+def notes(store, rowid):
+    return store.get_values(rowid, (ExerciseColumns.Notes,))[0]
+
+
+def test_journal_path():
+    assert journal_path("a.sqlite3") == "a.sqlite3.journal"
+    assert journal_path(":memory:") is None
+    assert journal_path("") is None
+
+
+def test_replay_applies_edits_in_utf16(store, path):
+    rowid = store.insert()
+    store.update([((rowid, ExerciseColumns.Notes), "a😀c")])
+    journal = EditJournal(path, store.journal_seq())
+    # The emoji is two UTF-16 code units
+    journal.append(rowid, ExerciseColumns.Notes, 3, 1, "d\n")
+    journal.append(rowid, ExerciseColumns.Notes, 0, 0, "é")
+    journal.append(rowid, ExerciseColumns.Original, 0, 0, "original")
+    journal.close()
+
+    assert replay(store, path) == 3
+    assert notes(store, rowid) == "éa😀d\n"
+    assert store.get_values(rowid, (ExerciseColumns.Original,)) == ("original",)
+    assert store.journal_seq() == 3
+
+
+def test_replay_skips_entries_in_table(store, path):
+    rowid = store.insert()
+    journal = EditJournal(path, store.journal_seq())
+    journal.append(rowid, ExerciseColumns.Notes, 0, 0, "ab")
+    store.update([((rowid, ExerciseColumns.Notes), "ab")], journal.seq)
+    journal.append(rowid, ExerciseColumns.Notes, 2, 0, "c")
+    journal.close()
+
+    assert replay(store, path) == 1
+    assert notes(store, rowid) == "abc"
+    # Replaying again changes nothing
+    assert replay(store, path) == 0
+    assert notes(store, rowid) == "abc"
+
+
+def test_replay_stops_at_torn_line(store, path):
+    rowid = store.insert()
+    journal = EditJournal(path, store.journal_seq())
+    journal.append(rowid, ExerciseColumns.Notes, 0, 0, "kept")
+    journal.close()
+    with open(path, "ab") as file:
+        file.write(b'{"row": 1, "col": "Notes", "pos": 0, "del": 0, "ins": "lo')
+
+    assert [entry["ins"] for entry in read_entries(path)] == ["kept"]
+    assert replay(store, path) == 1
+    assert notes(store, rowid) == "kept"
+
+
+def test_replay_of_missing_file(store, path):
+    assert replay(store, path) == 0
+    assert store.journal_seq() == 0
+
+
+def test_drop_discards_edits_of_reused_rowid(store, path):
+    rowid = store.insert()
+    journal = EditJournal(path, store.journal_seq())
+    journal.append(rowid, ExerciseColumns.Notes, 0, 0, "old row")
+    journal.drop(rowid)
+    store.delete(rowid)
+    assert store.insert() == rowid
+    journal.append(rowid, ExerciseColumns.Notes, 0, 0, "new row")
+    journal.close()
+
+    assert replay(store, path) == 3
+    assert notes(store, rowid) == "new row"
+
+
+def test_replay_ignores_deleted_rows(store, path):
+    kept = store.insert()
+    deleted = store.insert()
+    journal = EditJournal(path, store.journal_seq())
+    journal.append(deleted, ExerciseColumns.Notes, 0, 0, "lost")
+    journal.append(kept, ExerciseColumns.Notes, 0, 0, "kept")
+    journal.close()
+    store.delete(deleted)
+
+    assert replay(store, path) == 2
+    assert notes(store, kept) == "kept"
+    assert store.get_values(deleted, (ExerciseColumns.Notes,)) is None
+
+
+def test_compact(store, path):
+    rowid = store.insert()
+    journal = EditJournal(path, store.journal_seq())
+    journal.append(rowid, ExerciseColumns.Notes, 0, 0, "a")
+    journal.sync()
+    journal.append(rowid, ExerciseColumns.Notes, 1, 0, "b")
+    journal.sync()
+    # Entry 2 is still only in the file
+    journal.compact(1)
+    assert len(list(read_entries(path))) == 2
+
+    journal.append(rowid, ExerciseColumns.Notes, 2, 0, "c")
+    journal.compact(2)
+    assert list(read_entries(path)) == []
+    # Entry 3 is written on the next sync
+    journal.close()
+    assert [entry["seq"] for entry in read_entries(path)] == [3]
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from franklin_writing_exercise.exercise_io import (
+    import_records,
+    query_records,
+    read_csv,
+    read_jsonl,
+    read_records,
+    read_text_directory,
+)
+from franklin_writing_exercise.exercise_store import ExerciseColumns, ExerciseStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ExerciseStore(str(tmp_path / "exercises.sqlite3"))
+    yield store
+    store.close()
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+    return path
+
+
+def test_read_jsonl(tmp_path):
+    path = write_lines(
+        tmp_path / "records.jsonl",
+        [json.dumps({"Author": "Addison"}), "  ", json.dumps({"Original": "é"})],
+    )
+    assert list(read_jsonl(path)) == [{"Author": "Addison"}, {"Original": "é"}]
+
+
+@pytest.mark.parametrize("value", ["[1, 2]", "3", '"text"', "null"])
+def test_read_jsonl_rejects_non_objects(tmp_path, value):
+    path = write_lines(tmp_path / "records.jsonl", ['{"Author": "a"}', "", value])
+    with pytest.raises(ValueError, match="line 3: expected an object"):
+        list(read_jsonl(path))
+
+
+def test_read_csv(tmp_path):
+    path = write_lines(tmp_path / "records.csv", ["Author,Original", 'a,"x, y"'])
+    assert list(read_csv(path)) == [{"Author": "a", "Original": "x, y"}]
+
+
+def test_read_text_directory(tmp_path):
+    (tmp_path / "b.txt").write_text("second", encoding="utf-8")
+    (tmp_path / "a.txt").write_text("first", encoding="utf-8")
+    (tmp_path / "c.md").write_text("skipped", encoding="utf-8")
+    assert list(read_text_directory(tmp_path)) == [
+        {"Source": "a", "Original": "first"},
+        {"Source": "b", "Original": "second"},
+    ]
+
+
+def test_read_records_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        read_records(tmp_path / "records.txt")
+
+
+def test_import_records(store):
+    records = [{"Author": "a", "Original": "text", "Unknown": "x"}, {"Notes": None}]
+    totals = []
+    assert import_records(store.connection, records * 3, totals.append, 4) == 6
+
+    assert totals == [4, 6]
+    rows = list(store.iter_rows((ExerciseColumns.Author, ExerciseColumns.Notes)))
+    assert [row[1:] for row in rows] == [("a", ""), ("", "")] * 3
+    assert store.get_summaries([1])[0][1][2] == "text"
+
+
+def test_import_stops_at_invalid_record(tmp_path, store):
+    path = write_lines(tmp_path / "records.jsonl", ['{"Author": "a"}', "[]"])
+    with pytest.raises(ValueError):
+        import_records(store.connection, read_records(path), chunk_size=1)
+    assert len(list(store.iter_rows((ExerciseColumns.Author,)))) == 1
+
+
+@pytest.mark.parametrize("search", ["", "  \t"])
+def test_query_records_without_search(store, search):
+    import_records(store.connection, [{"Author": "a"}, {"Author": "b"}])
+    assert list(query_records(store.connection, (ExerciseColumns.Author,), search)) == [
+        {"Author": "a"},
+        {"Author": "b"},
+    ]
+
+
+def test_query_records_with_search(store):
+    import_records(store.connection, [{"Author": "addison"}, {"Author": "steele"}])
+    assert list(
+        query_records(store.connection, (ExerciseColumns.Author,), " stee ")
+    ) == [{"Author": "steele"}]
@@ -0,0 +1,237 @@
+import sqlite3
+import time
+
+import pytest
+from PyQt5.QtCore import Qt
+
+from franklin_writing_exercise.exercise_model import ExerciseModel
+from franklin_writing_exercise.exercise_store import ExerciseColumns, ExerciseStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "exercises.sqlite3")
+
+
+def create_rows(path: str, count: int):
+    store = ExerciseStore(path)
+    for i in range(count):
+        rowid = store.insert()
+        store.update([((rowid, ExerciseColumns.Author), f"author {i}")])
+    store.close()
+
+
+@pytest.fixture
+def model(qapp, path):
+    create_rows(path, 3)
+    model = ExerciseModel(path)
+    yield model
+    model.close()
+
+
+def stored(path: str, rowid: int, column: ExerciseColumns):
+    store = ExerciseStore(path)
+    values = store.get_values(rowid, (column,))
+    store.close()
+    return values and values[0]
+
+
+def test_invalid_row_is_rejected(model, path):
+    with pytest.raises(IndexError):
+        model.rowid(-1)
+    with pytest.raises(IndexError):
+        model.set_data(-1, ExerciseColumns.Notes, "notes")
+    with pytest.raises(IndexError):
+        model.get_values(-1, (ExerciseColumns.Notes,))
+
+    assert not model.removeRow(-1)
+    assert not model.removeRow(model.rowCount())
+    assert model.rowCount() == 3
+    model.close()
+    assert [stored(path, rowid, ExerciseColumns.Notes) for rowid in (1, 2, 3)] == [
+        ""
+    ] * 3
+
+
+def test_remove_waits_for_edits_in_flight(model, path, monkeypatch):
+    update = ExerciseStore.update
+
+    def slow_update(self, *args):
+        time.sleep(0.2)
+        return update(self, *args)
+
+    monkeypatch.setattr(ExerciseStore, "update", slow_update)
+    model.set_data(2, ExerciseColumns.Notes, "notes of the removed row")
+    model.flush()
+    assert model.removeRow(2)
+    # The rowid of the last row is reused
+    assert model.insertRow(2)
+    assert model.rowid(2) == 3
+    model.close()
+
+    assert stored(path, 3, ExerciseColumns.Notes) == ""
+
+
+def test_continuous_editing_is_flushed(qapp, path, monkeypatch):
+    create_rows(path, 1)
+    monkeypatch.setattr(ExerciseModel, "MAX_FLUSH_DELAY", 200)
+    model = ExerciseModel(path, flush_delay=100)
+    written = []
+    model.edits_written.connect(lambda keys, _: written.extend(keys))
+
+    # Each edit comes before the idle delay is over
+    start = time.perf_counter()
+    while not written and time.perf_counter() - start < 1:
+        model.set_data(0, ExerciseColumns.Notes, f"{time.perf_counter()}")
+        time.sleep(0.05)
+        qapp.processEvents()
+    elapsed = time.perf_counter() - start
+    model.close()
+
+    assert written
+    assert elapsed < 0.5
+
+
+def wait_until(qapp, condition, timeout: float = 5):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline
+        qapp.processEvents()
+
+
+def listed(model):
+    return [model.rowid(row) for row in range(model.rowCount())]
+
+
+def fetch_all(model):
+    while model.canFetchMore():
+        model.fetchMore()
+
+
+def display(model, row: int, column: ExerciseColumns):
+    return model.data(model.index(row, column.value))
+
+
+@pytest.fixture
+def paged(qapp, path, monkeypatch):
+    """A model of 5 rows, fetched 2 at a time."""
+    create_rows(path, 5)
+    monkeypatch.setattr(ExerciseModel, "PAGE_SIZE", 2)
+    model = ExerciseModel(path)
+    yield model
+    model.close()
+
+
+def test_rows_are_fetched_a_page_at_a_time(qapp, paged):
+    assert listed(paged) == [1, 2]
+    assert display(paged, 1, ExerciseColumns.Author) == "author 1"
+    paged.fetchMore()
+    assert listed(paged) == [1, 2, 3, 4]
+    paged.fetchMore()
+    assert listed(paged) == [1, 2, 3, 4, 5]
+    assert not paged.canFetchMore()
+
+    # Rows past the first page are read by the worker, and shown once read
+    wait_until(qapp, lambda: display(paged, 4, ExerciseColumns.Author) == "author 4")
+
+
+def test_sorted_rows_are_fetched_in_order(paged):
+    paged.sort(ExerciseColumns.Author.value, Qt.DescendingOrder)
+    assert listed(paged) == [5, 4]
+    fetch_all(paged)
+    assert listed(paged) == [5, 4, 3, 2, 1]
+
+    paged.sort(-1)
+    assert listed(paged) == [1, 2]
+
+
+def test_edited_row_is_not_fetched_again(paged):
+    paged.sort(ExerciseColumns.Author.value, Qt.AscendingOrder)
+    # Moves row 1 after the rows not fetched yet
+    paged.set_data(0, ExerciseColumns.Author, "zzz")
+    paged.flush(wait=True)
+    fetch_all(paged)
+    assert listed(paged) == [1, 2, 3, 4, 5]
+
+
+def test_inserted_row_is_listed_once(paged, path):
+    assert paged.insertRow(paged.rowCount())
+    assert listed(paged) == [1, 2, 6]
+    assert display(paged, 2, ExerciseColumns.Author) == ""
+    fetch_all(paged)
+    assert listed(paged) == [1, 2, 6, 3, 4, 5]
+    assert stored(path, 6, ExerciseColumns.Author) == ""
+
+
+def test_remove_row(model, path):
+    model.set_data(1, ExerciseColumns.Notes, "removed with the row")
+    assert model.removeRow(1)
+    assert listed(model) == [1, 3]
+    assert display(model, 1, ExerciseColumns.Author) == "author 2"
+    model.close()
+
+    assert stored(path, 2, ExerciseColumns.Author) is None
+    assert stored(path, 3, ExerciseColumns.Author) == "author 2"
+
+
+def test_edits_in_flight_are_shown_until_written(qapp, model, path, monkeypatch):
+    update = ExerciseStore.update
+
+    def slow_update(self, *args):
+        time.sleep(0.2)
+        return update(self, *args)
+
+    monkeypatch.setattr(ExerciseStore, "update", slow_update)
+    written = []
+    model.edits_written.connect(lambda keys, _: written.extend(keys))
+    model.set_data(0, ExerciseColumns.Author, "new author")
+    model.set_data(0, ExerciseColumns.Notes, "new notes")
+    model.flush()
+
+    assert stored(path, 1, ExerciseColumns.Notes) == ""
+    assert display(model, 0, ExerciseColumns.Author) == "new author"
+    assert model.get_values(0, (ExerciseColumns.Notes,)) == ("new notes",)
+    wait_until(qapp, lambda: len(written) == 2)
+    assert set(written) == {(1, ExerciseColumns.Author), (1, ExerciseColumns.Notes)}
+    assert stored(path, 1, ExerciseColumns.Notes) == "new notes"
+
+
+def test_failed_write_is_retried(model, path, monkeypatch):
+    def failing_update(*_):
+        raise sqlite3.OperationalError("database is locked")
+
+    failures = []
+    model.write_failed.connect(failures.append)
+    with monkeypatch.context() as patch:
+        patch.setattr(ExerciseStore, "update", failing_update)
+        model.set_data(0, ExerciseColumns.Notes, "kept")
+        model.flush(wait=True)
+    assert failures == ["database is locked"]
+    assert model.get_values(0, (ExerciseColumns.Notes,)) == ("kept",)
+
+    model.flush(wait=True)
+    assert stored(path, 1, ExerciseColumns.Notes) == "kept"
+
+
+def test_deferred_edit_is_read_when_flushed(model, path):
+    texts = ["typed", None]
+    reads = []
+
+    def read():
+        reads.append(texts.pop(0))
+        return reads[-1]
+
+    written = []
+    model.edits_written.connect(lambda keys, _: written.extend(keys))
+    model.defer_data(0, ExerciseColumns.Notes, read)
+    model.defer_data(0, ExerciseColumns.Notes, read)
+    assert not reads
+    model.flush(wait=True)
+    assert reads == ["typed"]
+    assert stored(path, 1, ExerciseColumns.Notes) == "typed"
+
+    # An edit leaving the value as it is needs no write
+    model.defer_data(0, ExerciseColumns.Notes, read)
+    model.flush(wait=True)
+    assert reads == ["typed", None]
+    assert written == [(1, ExerciseColumns.Notes)] * 2
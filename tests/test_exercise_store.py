@@ -0,0 +1,264 @@
+import sqlite3
+
+import pytest
+
+from franklin_writing_exercise import exercise_store
+from franklin_writing_exercise.exercise_store import (
+    MIGRATIONS,
+    PREVIEW_LENGTH,
+    SCHEMA_VERSION,
+    ExerciseColumns,
+    ExerciseStore,
+    _preview_sql,
+    preview,
+    search_query,
+)
+
+COLUMNS = ",".join(col.name for col in ExerciseColumns)
+
+# Rows of a baseline database, by rowid: Author, Source and Original; the other
+# columns are left NULL. Rowid 2 is deleted, so ids must be kept from rowids.
+BASELINE_ROWS = {
+    1: ("Addison", "The Spectator", "  \nOn wit\r\nand its kinds"),
+    3: (None, "Tatler", None),
+    4: ("steele", None, "x" * (PREVIEW_LENGTH + 20)),
+}
+
+
+def create_baseline(path: str, search_index: bool = False):
+    """Create a database as the first releases did, before schema versions."""
+    db = sqlite3.connect(path)
+    with db:
+        db.execute(
+            "CREATE TABLE FranklinExercise ("
+            + ",".join(col.name + " TEXT DEFAULT ''" for col in ExerciseColumns)
+            + ");"
+        )
+        for rowid in range(1, max(BASELINE_ROWS) + 1):
+            author, source, original = BASELINE_ROWS.get(rowid, ("", "", ""))
+            db.execute(
+                "INSERT INTO FranklinExercise "
+                "(rowid, Author, Source, Original, Notes, Rewrite, Correction, "
+                "Poetry, Prose) VALUES (?, ?, ?, ?, NULL, NULL, NULL, NULL, NULL);",
+                (rowid, author, source, original),
+            )
+        db.execute("DELETE FROM FranklinExercise WHERE rowid = 2;")
+        if search_index:
+            # Keyed by rowid, as some releases before version 1 made it
+            db.execute(
+                f"CREATE VIRTUAL TABLE FranklinExerciseSearch USING fts5({COLUMNS}, "
+                "content='FranklinExercise', content_rowid='rowid');"
+            )
+            db.execute(
+                "INSERT INTO FranklinExerciseSearch(FranklinExerciseSearch) "
+                "VALUES ('rebuild');"
+            )
+    db.close()
+
+
+def open_at(path: str, version: int, monkeypatch) -> ExerciseStore:
+    """Open `path` with a store migrating only up to `version`."""
+    with monkeypatch.context() as patch:
+        patch.setattr(exercise_store, "SCHEMA_VERSION", version)
+        patch.setattr(exercise_store, "MIGRATIONS", MIGRATIONS[:version])
+        return ExerciseStore(path)
+
+
+def schema_sql(store: ExerciseStore, name: str) -> str:
+    row = store.connection.execute(
+        "SELECT sql FROM sqlite_master WHERE name = ?;", (name,)
+    ).fetchone()
+    return row[0] if row else ""
+
+
+def rows(store: ExerciseStore):
+    return store.connection.execute(
+        "SELECT id, Author, Source, Original, Notes FROM FranklinExercise "
+        "ORDER BY id;"
+    ).fetchall()
+
+
+def expected_rows():
+    return [
+        (rowid, author or "", source or "", original or "", "")
+        for rowid, (author, source, original) in sorted(BASELINE_ROWS.items())
+    ]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "exercises.sqlite3")
+
+
+def test_migrations_cover_schema_version():
+    assert len(MIGRATIONS) == SCHEMA_VERSION
+
+
+@pytest.mark.parametrize("search_index", [False, True])
+def test_migrate_baseline(path, search_index):
+    create_baseline(path, search_index)
+    store = ExerciseStore(path)
+
+    assert store.schema_version() == SCHEMA_VERSION
+    assert rows(store) == expected_rows()
+    assert store.search_rowids(search_query("wit")) == [1]
+    assert store.search_rowids(search_query("tatler")) == [3]
+    assert store.journal_seq() == 0
+    for rowid, (_, _, original) in BASELINE_ROWS.items():
+        assert store.get_summaries([rowid])[0][1][2] == preview(original or "")
+    store.close()
+
+
+def test_migration_backs_up_database(path):
+    create_baseline(path)
+    ExerciseStore(path).close()
+
+    backup = sqlite3.connect(f"{path}.schema0.bak")
+    assert backup.execute("PRAGMA user_version;").fetchone()[0] == 0
+    assert backup.execute(
+        "SELECT rowid, Author, Notes FROM FranklinExercise ORDER BY rowid;"
+    ).fetchall() == [(1, "Addison", None), (3, None, None), (4, "steele", None)]
+    backup.close()
+
+
+def test_migrate_to_keyed(path, monkeypatch):
+    create_baseline(path, search_index=True)
+    store = open_at(path, 1, monkeypatch)
+
+    assert store.schema_version() == 1
+    assert rows(store) == expected_rows()
+    assert "NOT NULL" in schema_sql(store, "FranklinExercise")
+    assert "content_rowid='id'" in schema_sql(store, "FranklinExerciseSearch")
+    assert store.connection.execute(
+        "SELECT rowid FROM FranklinExerciseSearch "
+        "WHERE FranklinExerciseSearch MATCH 'steele';"
+    ).fetchall() == [(4,)]
+    assert not schema_sql(store, "FranklinExerciseV0")
+    store.close()
+
+
+def test_migrate_to_sort_indexes(path, monkeypatch):
+    create_baseline(path)
+    store = open_at(path, 2, monkeypatch)
+
+    assert "COLLATE NOCASE" in schema_sql(store, "FranklinExerciseAuthor")
+    assert "COLLATE NOCASE" in schema_sql(store, "FranklinExerciseSource")
+    assert schema_sql(store, "FranklinExerciseModified")
+    store.close()
+
+
+def test_migrate_to_summaries(path, monkeypatch):
+    create_baseline(path)
+    store = open_at(path, 3, monkeypatch)
+
+    assert rows(store) == expected_rows()
+    assert store.connection.execute(
+        "SELECT id, Preview FROM FranklinExercise ORDER BY id;"
+    ).fetchall() == [
+        (rowid, preview(original or ""))
+        for rowid, (_, _, original) in sorted(BASELINE_ROWS.items())
+    ]
+    # The indexes and triggers dropped with the old table are recreated
+    assert schema_sql(store, "FranklinExerciseAuthor")
+    assert schema_sql(store, "FranklinExercisePreviewUpdate")
+    store.update([((3, ExerciseColumns.Original), "A new passage")])
+    assert store.search_rowids(search_query("passage")) == [3]
+    store.close()
+
+
+def test_migrate_to_journal(path, monkeypatch):
+    create_baseline(path)
+    store = open_at(path, 4, monkeypatch)
+
+    assert store.journal_seq() == 0
+    store.update([((1, ExerciseColumns.Notes), "notes")], 7)
+    store.update([((1, ExerciseColumns.Notes), "notes")], 5)
+    assert store.journal_seq() == 7
+    store.close()
+
+
+def test_migrate_to_preview_index(path, monkeypatch):
+    create_baseline(path)
+    open_at(path, 4, monkeypatch).close()
+    store = ExerciseStore(path)
+
+    assert "Preview COLLATE NOCASE" in schema_sql(store, "FranklinExercisePreview")
+    assert [rowid for _, rowid in store.row_keys(None, 10, "Original")] == [3, 1, 4]
+    store.close()
+
+
+@pytest.mark.parametrize("version", range(SCHEMA_VERSION))
+def test_migrate_from_each_version(path, monkeypatch, version):
+    create_baseline(path, search_index=True)
+    open_at(path, version, monkeypatch).close()
+    store = ExerciseStore(path)
+
+    assert store.schema_version() == SCHEMA_VERSION
+    assert rows(store) == expected_rows()
+    assert store.search_rowids(search_query("spectator")) == [1]
+    store.close()
+
+
+def test_new_database_matches_migrated(tmp_path, path):
+    create_baseline(path)
+    migrated = ExerciseStore(path)
+    new = ExerciseStore(str(tmp_path / "new.sqlite3"))
+
+    def schema(store):
+        return sorted(
+            (kind, name)
+            for kind, name in store.connection.execute(
+                "SELECT type, name FROM sqlite_master;"
+            )
+        )
+
+    assert schema(migrated) == schema(new)
+    migrated.close()
+    new.close()
+
+
+def test_newer_schema_is_refused(path):
+    ExerciseStore(path).close()
+    db = sqlite3.connect(path)
+    db.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1};")
+    db.close()
+    with pytest.raises(ValueError):
+        ExerciseStore(path)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        " \t\r\n ",
+        "one line",
+        "\n\n  first\nsecond",
+        "first\r\nsecond",
+        "trailing  \t",
+        "x" * PREVIEW_LENGTH,
+        "x" * (PREVIEW_LENGTH + 1),
+        "é" * (PREVIEW_LENGTH + 5),
+        "😀" * (PREVIEW_LENGTH - 1) + "\n",
+        "\tindented\tline",
+    ],
+)
+def test_preview_sql_matches_preview(text):
+    db = sqlite3.connect(":memory:")
+    (result,) = db.execute(
+        f"SELECT {_preview_sql('value')} FROM (SELECT ? AS value);", (text,)
+    ).fetchone()
+    db.close()
+    assert result == preview(text)
+
+
+def test_lookups_of_many_rowids(path):
+    store = ExerciseStore(path)
+    for i in range(1200):
+        store.insert({ExerciseColumns.Original: f"word{i % 2} text"})
+    rowids = list(range(1, 1201))
+
+    assert [rowid for rowid, _ in store.get_summaries(rowids)] == rowids
+    snippets = store.snippets(search_query("word1"), rowids)
+    assert sorted(snippets) == rowids[1::2]
+    assert snippets[2] == "[word1] text"
+    store.close()
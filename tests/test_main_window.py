@@ -0,0 +1,153 @@
+import pytest
+from PyQt5.QtCore import Qt
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication, QFileDialog, QMessageBox, QProgressDialog
+
+from franklin_writing_exercise.exercise_store import ExerciseColumns, ExerciseStore
+from franklin_writing_exercise import main_window
+from franklin_writing_exercise.latency_probe import RECORD_SESSION_ENV
+from franklin_writing_exercise.main_window import MainWindow
+from franklin_writing_exercise.sql_trace import TRACER
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "exercises.sqlite3"
+    store = ExerciseStore(str(path))
+    for author in ("first", "second", "third"):
+        rowid = store.insert()
+        store.update([((rowid, ExerciseColumns.Author), author)])
+    store.close()
+    return path
+
+
+@pytest.fixture
+def window(qapp, path):
+    window = MainWindow(path)
+    yield window
+    window.close()
+
+
+def stored_rows(path):
+    store = ExerciseStore(str(path))
+    rows = list(store.iter_rows((ExerciseColumns.Author, ExerciseColumns.Notes)))
+    store.close()
+    return rows
+
+
+def test_edits_at_startup_go_to_row_shown(window, path):
+    assert window.table_view.currentIndex().row() == 0
+    assert window.edit_author.text() == "first"
+    window.edit_notes.setPlainText("notes")
+    window.close()
+
+    assert stored_rows(path) == [
+        (1, "first", "notes"),
+        (2, "second", ""),
+        (3, "third", ""),
+    ]
+
+
+def test_remove_at_startup_removes_row_shown(window, path):
+    window.actionRemove.trigger()
+    assert window.edit_author.text() == "second"
+    window.close()
+
+    assert stored_rows(path) == [(2, "second", ""), (3, "third", "")]
+
+
+def test_remove_without_rows_shown(window, path):
+    window.edit_search.setText("nothing matches this")
+    assert window._model.rowCount() == 0
+    window.actionRemove.trigger()
+    window.close()
+
+    assert len(stored_rows(path)) == 3
+
+
+def wait_for_import(window):
+    finished = []
+    window._model.import_finished.connect(lambda *args: finished.append(args))
+    while not finished:
+        QApplication.processEvents()
+    return finished[0]
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    monkeypatch.setattr(TRACER, "enabled", True)
+    TRACER.reset()
+    yield TRACER
+    TRACER.reset()
+
+
+def traced(tracer, prefix):
+    return [
+        statement
+        for statement in tracer.report()["statements"]
+        if statement["sql"].startswith(prefix)
+    ]
+
+
+def test_import_and_export_are_traced(window, tmp_path, tracer, monkeypatch):
+    source = tmp_path / "import.jsonl"
+    source.write_text('{"Author": "fourth"}\n', encoding="utf-8")
+    target = tmp_path / "export.csv"
+    monkeypatch.setattr(QFileDialog, "getOpenFileName", lambda *_: (str(source), ""))
+    monkeypatch.setattr(QFileDialog, "getSaveFileName", lambda *_: (str(target), ""))
+
+    window.actionImport.trigger()
+    wait_for_import(window)
+    assert window._model.rowCount() == 4
+    assert traced(tracer, "INSERT INTO FranklinExercise (Author")
+    window.actionExport.trigger()
+    assert traced(tracer, "SELECT Author,Source")
+    assert target.read_text(encoding="utf-8").count("\n") == 5
+
+
+def test_failed_import_is_reported(window, tmp_path, monkeypatch):
+    source = tmp_path / "import.jsonl"
+    source.write_text('{"Author": "fourth"}\n[]\n', encoding="utf-8")
+    warnings = []
+    monkeypatch.setattr(QMessageBox, "warning", lambda *args: warnings.append(args))
+
+    window._import(source)
+    assert window.findChild(QProgressDialog).windowModality() == Qt.WindowModal
+    assert wait_for_import(window) == (0, "line 2: expected an object")
+    assert warnings[0][1:] == ("Import Failed", "line 2: expected an object")
+    assert window._model.rowCount() == 3
+
+
+@pytest.fixture
+def opened(tmp_path, monkeypatch):
+    """Files opened by the main window, with sessions recorded to one."""
+    files = []
+
+    def recording_open(*args, **kwargs):
+        files.append(open(*args, **kwargs))
+        return files[-1]
+
+    monkeypatch.setenv(RECORD_SESSION_ENV, str(tmp_path / "session.jsonl"))
+    monkeypatch.setattr(main_window, "open", recording_open, raising=False)
+    return files
+
+
+def test_session_recording_is_closed(qapp, path, opened):
+    window = MainWindow(path)
+    QTest.keyClicks(window.edit_notes, "ab")
+    window.close()
+
+    assert len(opened) == 1 and opened[0].closed
+    with open(opened[0].name, encoding="utf-8") as file:
+        assert len(file.readlines()) == 2
+
+
+def test_session_recording_is_closed_if_setup_fails(qapp, path, opened, monkeypatch):
+    def failing_setup(self, _):
+        self._model.close()
+        raise RuntimeError("setup failed")
+
+    monkeypatch.setattr(MainWindow, "setupUi", failing_setup)
+    with pytest.raises(RuntimeError):
+        MainWindow(path)
+    assert len(opened) == 1 and opened[0].closed